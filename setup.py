@@ -35,13 +35,20 @@ setup(name='vtracker',
           'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
           'Natural Language :: English',
           'Operating System :: OS Independent',
-          'Programming Language :: Python :: 2',
           'Programming Language :: Python :: 3',
+          'Programming Language :: Python :: 3 :: Only',
+          'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
+          'Programming Language :: Python :: 3.9',
+          'Programming Language :: Python :: 3.10',
+          'Programming Language :: Python :: 3.11',
+          'Programming Language :: Python :: 3.12',
           'Topic :: Scientific/Engineering',
       ],
       keywords='track relationship group membership version',
       packages=['vtracker'],
-      install_requires=['typing'],
-      python_requires='>=2.7',
+      extras_require={'numpy': ['numpy']},
+      entry_points={'console_scripts': ['vtracker = vtracker.cli:main']},
+      python_requires='>=3.7',
       data_files=[("", ["LICENSE"])]
       )
@@ -0,0 +1,74 @@
+use std::collections::HashMap;
+use std::io::{self, BufRead, Write};
+
+use vtracker::model::SankeyD3;
+use vtracker::vtracker::VTracker;
+
+/*
+    Reads a tracker from stdin and writes the D3 Sankey JSON to stdout.
+
+    The first line contains the tab-separated versions (oldest to newest), each
+    subsequent line contains the uid followed by the state at each version,
+    an empty state means that the uid is not present in that version.
+*/
+
+fn json_str(value: &str) -> String {
+    let mut out = String::with_capacity(value.len() + 2);
+    out.push('"');
+    for c in value.chars() {
+        match c {
+            '"' => out.push_str("\\\""),
+            '\\' => out.push_str("\\\\"),
+            '\n' => out.push_str("\\n"),
+            '\r' => out.push_str("\\r"),
+            '\t' => out.push_str("\\t"),
+            c if (c as u32) < 0x20 => out.push_str(&format!("\\u{:04x}", c as u32)),
+            c => out.push(c),
+        }
+    }
+    out.push('"');
+    out
+}
+
+fn json_ids(ids: &Vec<usize>) -> String {
+    let ids: Vec<String> = ids.iter().map(|x| x.to_string()).collect();
+    format!("[{}]", ids.join(","))
+}
+
+fn sankey_to_json(sankey: &SankeyD3) -> String {
+    let nodes: Vec<String> = sankey.nodes.iter().map(|n| format!(
+        "{{\"col\":{},\"id\":{},\"linkHighlightId\":{},\"name\":{},\"nodeHighlightId\":{},\"total\":{}}}",
+        json_str(&n.col), n.id, json_ids(&n.link_highlight_id), json_str(&n.name),
+        json_ids(&n.node_highlight_id), n.total)).collect();
+    let links: Vec<String> = sankey.links.iter().map(|l| format!(
+        "{{\"id\":{},\"linkHighlightId\":{},\"nodeHighlightId\":{},\"source\":{},\"target\":{},\"value\":{}}}",
+        l.id, json_ids(&l.link_highlight_id), json_ids(&l.node_highlight_id),
+        l.source, l.target, l.value)).collect();
+    format!("{{\"links\":[{}],\"nodes\":[{}]}}", links.join(","), nodes.join(","))
+}
+
+fn main() {
+    let stdin = io::stdin();
+    let mut lines = stdin.lock().lines();
+
+    let header = lines.next().expect("Missing header").expect("Unable to read stdin");
+    let versions: Vec<String> = header.split('\t').map(|x| x.to_string()).collect();
+    let mut vt = VTracker::new(&versions, None);
+
+    for line in lines {
+        let line = line.expect("Unable to read stdin");
+        let mut fields = line.split('\t');
+        let uid = fields.next().expect("Missing uid");
+        let mut ver_states: HashMap<String, String> = HashMap::new();
+        for (version, state) in versions.iter().zip(fields) {
+            if !state.is_empty() {
+                ver_states.insert(version.to_string(), state.to_string());
+            }
+        }
+        vt.add(uid, &ver_states);
+    }
+
+    let stdout = io::stdout();
+    let mut handle = stdout.lock();
+    handle.write_all(sankey_to_json(&vt.as_sankey_json()).as_bytes()).expect("Unable to write stdout");
+}
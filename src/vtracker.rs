@@ -15,6 +15,7 @@ pub struct VTracker {
     pub uid_to_edge: HashMap<String, HashSet<EdgeKey>>,
 
     pub str_na: String,
+    na_keys: Vec<NodeKey>,
 }
 
 impl VTracker {
@@ -32,6 +33,11 @@ impl VTracker {
             None => "Not Present".to_string(),
         };
 
+        // The key of each version when the uid is not present
+        let na_keys: Vec<NodeKey> = idx_to_ver.iter()
+            .map(|v| NodeKey::new(v, &str_not_available))
+            .collect();
+
         VTracker {
             ver_to_idx,
             idx_to_ver,
@@ -39,6 +45,7 @@ impl VTracker {
             uid_to_node: HashMap::new(),
             uid_to_edge: HashMap::new(),
             str_na: str_not_available,
+            na_keys,
         }
     }
 
@@ -58,53 +65,48 @@ impl VTracker {
         self.uid_to_edge.get_mut(uid).unwrap().insert(key.clone());
     }
 
-    fn add_nodes(&mut self, uid: &str, ver_states: &HashMap<String, String>) -> Vec<NodeKey> {
-        let mut out: Vec<NodeKey> = Vec::new();
-        for version in &self.idx_to_ver {
-
-            // Check if this uid appears in this version
-            let key = match ver_states.get(version) {
-                Some(state) => NodeKey::new(version, state),
-                None => NodeKey::new(version, &self.str_na),
-            };
-
-            if self.graph.get_node(&key).is_none() {
-                let uids: HashSet<String> = HashSet::from_iter(vec![uid.to_string()]);
-                self.graph.add_node(key.clone(), uids);
-            } else {
-                let node = self.graph.get_node_mut(&key);
-                node.uids.insert(uid.to_string());
+    fn node_keys(&self, ver_states: &HashMap<String, String>) -> Vec<NodeKey> {
+        // Resolve the key at each version in a single pass, validating as we go
+        let mut out: Vec<NodeKey> = self.na_keys.clone();
+        for (version, state) in ver_states {
+            match self.ver_to_idx.get(version) {
+                Some(idx) => out[*idx] = NodeKey::new(version, state),
+                None => panic!("Specified version which is not a part of this tracker."),
             }
-            out.push(key);
         }
         out
     }
 
-    fn add_edges(&mut self, uid: &str, ver_states: &HashMap<String, String>) -> Vec<EdgeKey> {
+    fn add_nodes(&mut self, uid: &str, node_keys: &Vec<NodeKey>) {
+        for key in node_keys {
+            match self.graph.node_key_to_id.get(key) {
+                Some(id) => {
+                    self.graph.nodes[*id].uids.insert(uid.to_string());
+                }
+                None => {
+                    let uids: HashSet<String> = HashSet::from_iter(vec![uid.to_string()]);
+                    self.graph.add_node(key.clone(), uids);
+                }
+            }
+        }
+    }
+
+    fn add_edges(&mut self, uid: &str, node_keys: &Vec<NodeKey>) -> Vec<EdgeKey> {
         let mut out: Vec<EdgeKey> = Vec::new();
-        for i in 0..&self.idx_to_ver.len() - 1 {
-            let ver_from = &self.idx_to_ver[i];
-            let ver_to = &self.idx_to_ver[i + 1];
-
-            // Check if this uid appears in this or the next version
-            let key_from = match ver_states.get(ver_from) {
-                Some(k) => NodeKey::new(ver_from, k),
-                None => NodeKey::new(ver_from, &self.str_na),
-            };
-            let key_to = match ver_states.get(ver_to) {
-                Some(k) => NodeKey::new(ver_to, k),
-                None => NodeKey::new(ver_to, &self.str_na),
-            };
+        for pair in node_keys.windows(2) {
+            let key_from = &pair[0];
+            let key_to = &pair[1];
 
             // Create the edge associated with this key
-            let edge_key = EdgeKey::new(&key_from, &key_to);
-
-            if self.graph.get_edge(&edge_key).is_none() {
-                let uids: HashSet<String> = HashSet::from_iter(vec![uid.to_string()]);
-                self.graph.add_edge(&key_from, &key_to, uids);
-            } else {
-                let edge = self.graph.get_edge_mut(&edge_key);
-                edge.uids.insert(uid.to_string());
+            let edge_key = EdgeKey::new(key_from, key_to);
+            match self.graph.edge_key_to_id.get(&edge_key) {
+                Some(id) => {
+                    self.graph.edges[*id].uids.insert(uid.to_string());
+                }
+                None => {
+                    let uids: HashSet<String> = HashSet::from_iter(vec![uid.to_string()]);
+                    self.graph.add_edge(key_from, key_to, uids);
+                }
             }
             out.push(edge_key);
         }
@@ -112,28 +114,24 @@ impl VTracker {
     }
 
     pub fn add(&mut self, uid: &str, ver_states: &HashMap<String, String>) {
-        let ver_states_keys: HashSet<&String> = HashSet::from_iter(ver_states.keys());
-        let ver_to_idx_keys: HashSet<&String> = HashSet::from_iter(self.ver_to_idx.keys());
 
         // Sanity checking
-        if ver_states_keys.difference(&ver_to_idx_keys).count() > 0 {
-            panic!("Specified version which is not a part of this tracker.");
-        }
+        let node_keys = self.node_keys(ver_states);
         if self.uid_to_node.contains_key(uid) {
             panic!("Specified uid already exists in this tracker.");
         }
 
         // Iterate over each expected version
-        let node_keys_to_add = self.add_nodes(uid, &ver_states);
-        for node_key in &node_keys_to_add {
-            self.add_uid_to_node(uid, node_key);
-        }
+        self.add_nodes(uid, &node_keys);
 
         // Create each of the edges
-        let edge_keys_to_add: Vec<EdgeKey> = self.add_edges(uid, &ver_states);
+        let edge_keys_to_add: Vec<EdgeKey> = self.add_edges(uid, &node_keys);
         for edge_key in &edge_keys_to_add {
             self.add_uid_to_edge(uid, edge_key);
         }
+        for node_key in node_keys {
+            self.add_uid_to_node(uid, &node_key);
+        }
     }
 
     pub fn build_uid_paths(&self) -> (HashMap<String, HashSet<usize>>, HashMap<String, HashSet<usize>>) {
@@ -141,12 +139,14 @@ impl VTracker {
         let mut nodes: HashMap<String, HashSet<usize>> = HashMap::new();
 
         for uid in self.uid_to_node.keys() {
-            for edge_key in self.uid_to_edge.get(uid).unwrap() {
-                let edge = self.graph.get_edge(edge_key).unwrap();
-                if edges.get(uid).is_none() {
-                    edges.insert(uid.to_string(), HashSet::new());
+
+            // A uid has no edges when the tracker only has a single version
+            edges.insert(uid.to_string(), HashSet::new());
+            if let Some(edge_keys) = self.uid_to_edge.get(uid) {
+                for edge_key in edge_keys {
+                    let edge = self.graph.get_edge(edge_key).unwrap();
+                    edges.get_mut(uid).unwrap().insert(edge.id);
                 }
-                edges.get_mut(uid).unwrap().insert(edge.id);
             }
 
             for node_key in self.uid_to_node.get(uid).unwrap() {
@@ -275,6 +275,20 @@ fn test_v_tracker_new() {
     assert_eq!(vt.uid_to_edge.len(), 0);
 }
 
+#[test]
+fn test_v_tracker_single_version() {
+    let versions: Vec<String> = vec!["a".to_string()];
+    let mut vt = VTracker::new(&versions, None);
+    let states = HashMap::from_iter(vec![("a".to_string(), "x".to_string())]);
+    vt.add("x", &states);
+
+    let sankey = vt.as_sankey_json();
+    assert_eq!(sankey.nodes.len(), 1);
+    assert_eq!(sankey.links.len(), 0);
+    assert_eq!(sankey.nodes[0].link_highlight_id, Vec::<usize>::new());
+    assert_eq!(sankey.nodes[0].node_highlight_id, vec![0]);
+}
+
 fn test_init_v_tracker() -> VTracker {
     /*
         +--------------+--------+--------------+
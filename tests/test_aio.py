@@ -0,0 +1,78 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import asyncio
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from vtracker import VTracker
+
+
+def _init_tracker():
+    vt = VTracker(('1', '2', '3'))
+    vt.add('x', {'1': 'a', '2': 'a'})
+    vt.add('y', {'2': 'b', '3': 'a'})
+    vt.add('z', {'2': 'b'})
+    return vt
+
+
+class TestAio(unittest.TestCase):
+
+    def test_as_sankey_json_async(self):
+        vt = _init_tracker()
+
+        async def run():
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                return await asyncio.gather(*[vt.as_sankey_json_async(executor) for _ in range(8)])
+
+        expected = vt.as_sankey_json()
+        for result in asyncio.run(run()):
+            self.assertDictEqual(expected, result)
+
+    def test_iter_sankey_json_async(self):
+        vt = _init_tracker()
+
+        async def run():
+            out = {'links': list(), 'nodes': list()}
+            chunk_sizes = list()
+            async for section, records in vt.iter_sankey_json_async(chunk_size=4):
+                out[section].extend(records)
+                chunk_sizes.append(len(records))
+            return out, chunk_sizes
+
+        out, chunk_sizes = asyncio.run(run())
+        self.assertDictEqual(vt.as_sankey_json(), out)
+        self.assertListEqual([4, 2, 4, 1], chunk_sizes)
+
+    def test_iter_sankey_json_async_raises_ValueError(self):
+        vt = _init_tracker()
+
+        async def run():
+            async for _ in vt.iter_sankey_json_async(chunk_size=0):
+                pass
+
+        self.assertRaises(ValueError, asyncio.run, run())
+
+    def test_iter_sankey_json_async_process_pool_raises_ValueError(self):
+        vt = _init_tracker()
+
+        async def run():
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                async for _ in vt.iter_sankey_json_async(executor=executor):
+                    pass
+
+        self.assertRaises(ValueError, asyncio.run, run())
@@ -0,0 +1,131 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from vtracker import VTracker
+from vtracker.batch import MANIFEST, build_index, export_taxa, read_manifest, read_release, taxon_file_name
+from vtracker.cli import main
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.out_dir = os.path.join(self.tmp_dir, 'out')
+        self.releases = {'1': 'x\ta\n', '2': '# comment\nx\ta\ny\tb c\nz\tb c\n', '3': 'y\ta\n'}
+        for version, content in self.releases.items():
+            with open(os.path.join(self.tmp_dir, version + '.tsv'), 'w') as fh:
+                fh.write(content)
+        self.argv = ['export', '--out-dir', self.out_dir, '--processes', '2']
+        for version in ('1', '2', '3'):
+            self.argv.extend(['--release', version, os.path.join(self.tmp_dir, version + '.tsv')])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _read(self, taxon):
+        with open(os.path.join(self.out_dir, taxon_file_name(taxon))) as fh:
+            return json.load(fh)
+
+    def test_read_release(self):
+        path = os.path.join(self.tmp_dir, '2.tsv')
+        self.assertDictEqual({'x': 'a', 'y': 'b c', 'z': 'b c'}, read_release(path))
+
+    def test_read_release_raises_ValueError(self):
+        path = os.path.join(self.tmp_dir, 'bad.tsv')
+        with open(path, 'w') as fh:
+            fh.write('# comment\nx\ta\ny b\n')
+        with self.assertRaisesRegex(ValueError, re.escape('%s:3:' % path)):
+            read_release(path)
+
+    def test_main_export_invalid(self):
+        bad_path = os.path.join(self.tmp_dir, 'bad.tsv')
+        with open(bad_path, 'w') as fh:
+            fh.write('x a\n')
+        for argv, message in ((self.argv + ['--processes', '0'], "'0' is not a positive integer"),
+                              (self.argv + ['--release', '4', bad_path], '%s:1:' % bad_path),
+                              (self.argv + ['--release', '4', bad_path + '.missing'], bad_path + '.missing')):
+            stderr = io.StringIO()
+            with self.assertRaises(SystemExit) as cm, mock.patch('sys.stderr', stderr):
+                main(argv)
+            self.assertEqual(2, cm.exception.code)
+            self.assertIn(message, stderr.getvalue())
+        self.assertFalse(os.path.exists(self.out_dir))
+
+    def test_build_index(self):
+        versions, uid_states, taxon_uids = build_index([('1', {'x': 'a'}), ('2', {'x': 'b', 'y': 'a'})])
+        self.assertTupleEqual(('1', '2'), versions)
+        self.assertDictEqual({'x': {'1': 'a', '2': 'b'}, 'y': {'2': 'a'}}, uid_states)
+        self.assertDictEqual({'a': {'x', 'y'}, 'b': {'x'}}, taxon_uids)
+
+    def test_taxon_file_name(self):
+        self.assertEqual('a.json', taxon_file_name('a'))
+        self.assertNotEqual(taxon_file_name('b c'), taxon_file_name('b/c'))
+        self.assertNotIn('/', taxon_file_name('../b/c'))
+
+    def test_main_export(self):
+        self.assertEqual(0, main(self.argv))
+
+        vt = VTracker(('1', '2', '3'))
+        vt.add('x', {'1': 'a', '2': 'a'})
+        vt.add('y', {'2': 'b c', '3': 'a'})
+        self.assertDictEqual(json.loads(json.dumps(vt.as_sankey_json())), self._read('a'))
+        self.assertEqual(3, len(os.listdir(self.out_dir)))
+
+        # Unchanged taxa are skipped, changed taxa are written again.
+        mtime = os.path.getmtime(os.path.join(self.out_dir, taxon_file_name('b c')))
+        with open(os.path.join(self.tmp_dir, '3.tsv'), 'w') as fh:
+            fh.write('y\ta\nw\ta\n')
+        self.assertEqual(0, main(self.argv))
+        self.assertEqual(mtime, os.path.getmtime(os.path.join(self.out_dir, taxon_file_name('b c'))))
+        totals = {(n['col'], n['name']): n['total'] for n in self._read('a')['nodes']}
+        self.assertEqual(2, totals[('3', 'a')])
+
+        with open(os.path.join(self.out_dir, MANIFEST)) as fh:
+            self.assertEqual(2, len(fh.readlines()))
+
+    def test_main_export_taxa(self):
+        taxa_path = os.path.join(self.tmp_dir, 'taxa.txt')
+        with open(taxa_path, 'w') as fh:
+            fh.write('b c\n')
+        self.assertEqual(0, main(self.argv + ['--taxa', taxa_path]))
+        self.assertListEqual(sorted([MANIFEST, taxon_file_name('b c')]), sorted(os.listdir(self.out_dir)))
+
+    def test_export_taxa_duplicates(self):
+        index = build_index([('1', {'x': 'a'}), ('2', {'x': 'b'})])
+        self.assertTupleEqual((1, 0), export_taxa(*index, self.out_dir, taxa=['a', 'a'], processes=1))
+        self.assertTupleEqual((0, 1), export_taxa(*index, self.out_dir, taxa=['a', 'a'], processes=1))
+
+    def test_export_taxa_escapes_manifest(self):
+        taxa = ('a\tb', 'c\nd', 'e\\f')
+        index = build_index([('1', {'x': taxa[0], 'y': taxa[1], 'z': taxa[2]})])
+        self.assertTupleEqual((3, 0), export_taxa(*index, self.out_dir, processes=1))
+        self.assertSetEqual(set(taxa), set(read_manifest(self.out_dir)))
+        self.assertTupleEqual((0, 3), export_taxa(*index, self.out_dir, processes=1))
+
+        # A partly written line is ignored.
+        with open(os.path.join(self.out_dir, MANIFEST), 'a') as fh:
+            fh.write('0123\t"g')
+        self.assertSetEqual(set(taxa), set(read_manifest(self.out_dir)))
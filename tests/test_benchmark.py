@@ -0,0 +1,91 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+"""Throughput benchmarks, set VTRACKER_BENCH_UIDS to change the number of entities added."""
+
+import os
+import random
+import time
+import unittest
+
+from vtracker import VTracker
+
+N_UIDS = int(os.environ.get('VTRACKER_BENCH_UIDS', 10000))
+
+# The slowest add may be, relative to a plain dict-of-sets loop in the same run.
+# This was about 3.8 before add was reworked, and is about 2 after.
+MAX_ADD_RATIO = 3.0
+
+
+def taxonomy_rows(n_uids, n_versions=10, n_states=50, seed=0):
+    """Entities which mostly keep their state between versions, as in a taxonomy."""
+    rng = random.Random(seed)
+    versions = tuple('R%d' % i for i in range(n_versions))
+    rows = list()
+    for i in range(n_uids):
+        ver_states, state = dict(), rng.randrange(n_states)
+        for ver in versions:
+            if rng.random() < 0.05:
+                state = rng.randrange(n_states)
+            if rng.random() < 0.95:
+                ver_states[ver] = 's%d' % state
+        rows.append(('u%d' % i, ver_states))
+    return versions, rows
+
+
+def add_plain(versions, rows):
+    """The least work add could do, the uids of each node and edge as a dict of sets."""
+    ver_to_idx = {v: i for i, v in enumerate(versions)}
+    na_keys = [(v, VTracker.str_na) for v in versions]
+    nodes, edges = dict(), dict()
+    for uid, ver_states in rows:
+        keys = list(na_keys)
+        for ver, state in ver_states.items():
+            keys[ver_to_idx[ver]] = (ver, state)
+        for key in keys:
+            nodes.setdefault(key, set()).add(uid)
+        for edge_key in zip(keys, keys[1:]):
+            edges.setdefault(edge_key, set()).add(uid)
+
+
+def add_tracker(versions, rows):
+    """Add each entity to a new tracker."""
+    vt = VTracker(versions)
+    for uid, ver_states in rows:
+        vt.add(uid, ver_states)
+
+
+def time_add(versions, rows, repeat=5):
+    """Return the fastest time (in microseconds) per add, for a tracker and the plain loop.
+
+    Runs are interleaved, so both see the same load.
+    """
+    best = {add_tracker: float('inf'), add_plain: float('inf')}
+    for _ in range(repeat):
+        for fn in best:
+            start = time.perf_counter()
+            fn(versions, rows)
+            best[fn] = min(best[fn], time.perf_counter() - start)
+    return best[add_tracker] / len(rows) * 1e6, best[add_plain] / len(rows) * 1e6
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_add(self):
+        versions, rows = taxonomy_rows(N_UIDS)
+        tracker_us, plain_us = time_add(versions, rows)
+        self.assertLess(tracker_us / plain_us, MAX_ADD_RATIO)
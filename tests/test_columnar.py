@@ -0,0 +1,78 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from vtracker import VTracker
+from vtracker.columnar import columns_to_sankey_json, load_npz, save_npz
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _sorted_sankey_json(sankey_json):
+    for record in sankey_json['nodes'] + sankey_json['links']:
+        record['linkHighlightId'] = sorted(record['linkHighlightId'])
+        record['nodeHighlightId'] = sorted(record['nodeHighlightId'])
+    return sankey_json
+
+
+class TestColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.vt = VTracker(('1', '2', '3'))
+        self.vt.add('x', {'1': 'a', '2': 'a'})
+        self.vt.add('y', {'2': 'b', '3': 'a'})
+        self.vt.add('z', {'2': 'b'})
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_as_sankey_columns(self):
+        columns = self.vt.as_sankey_columns()
+        mis = self.vt.str_na
+        self.assertTupleEqual(('1', '2', '3'), columns['versions'])
+        self.assertTupleEqual(('a', 'a', mis, mis, 'b', 'a'), columns['node_name'])
+        self.assertListEqual([0, 1, 2, 0, 1, 2], list(columns['node_col']))
+        self.assertListEqual([1, 1, 2, 2, 2, 1], list(columns['node_total']))
+        self.assertListEqual([0, 1, 3, 4, 4], list(columns['link_source']))
+        self.assertListEqual([1, 2, 4, 5, 2], list(columns['link_target']))
+        self.assertListEqual([1, 1, 2, 1, 1], list(columns['link_value']))
+        self.assertListEqual([0, 3, 6, 11, 15, 19, 22], list(columns['node_node_highlight_offsets']))
+        self.assertListEqual([0, 1, 2, 0, 1, 2, 0, 1, 2, 3, 4], list(columns['node_node_highlight_indices'])[0:11])
+
+    def test_columns_to_sankey_json(self):
+        columns = self.vt.as_sankey_columns()
+        expected = _sorted_sankey_json(self.vt.as_sankey_json())
+        self.assertDictEqual(expected, columns_to_sankey_json(columns))
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed.')
+    def test_save_load_npz(self):
+        path = os.path.join(self.tmp_dir, 'sankey.npz')
+        columns = self.vt.as_sankey_columns()
+        save_npz(columns, path)
+        loaded = load_npz(path)
+        self.assertSetEqual(set(columns), set(loaded))
+        self.assertEqual(numpy.int64, loaded['node_total'].dtype)
+        expected = _sorted_sankey_json(self.vt.as_sankey_json())
+        self.assertDictEqual(expected, columns_to_sankey_json(loaded))
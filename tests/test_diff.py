@@ -0,0 +1,145 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import random
+import unittest
+
+from vtracker import VTracker
+from vtracker.diff import HASH_MASK, DiffIndex, diff_trackers, uid_hash
+
+
+def _init_tracker():
+    vt = VTracker(('1', '2', '3'))
+    vt.add('x', {'1': 'a', '2': 'a'})
+    vt.add('y', {'2': 'b', '3': 'a'})
+    vt.add('z', {'2': 'b'})
+    return vt
+
+
+class TestDiff(unittest.TestCase):
+
+    def test_uid_hash(self):
+        self.assertEqual(uid_hash('x'), uid_hash('x'))
+        self.assertNotEqual(uid_hash('x'), uid_hash('y'))
+        self.assertLessEqual(uid_hash('x'), HASH_MASK)
+        self.assertNotEqual(uid_hash(5), uid_hash('5'))
+        self.assertEqual(uid_hash(5), uid_hash(5))
+
+    def test_add_non_str_uid(self):
+        vt = VTracker(('1', '2'))
+        vt.add(5, {'1': 'a'})
+        other = VTracker(('1', '2'))
+        other.add('5', {'1': 'a'})
+        self.assertSetEqual({5, '5'}, vt.diff(other).uids)
+
+    def test_hash_is_order_independent(self):
+        vt = _init_tracker()
+        other = VTracker(('1', '2', '3'))
+        other.add('z', {'2': 'b'})
+        other.add('y', {'2': 'b', '3': 'a'})
+        other.add('x', {'1': 'a', '2': 'a'})
+        self.assertListEqual(vt._get_diff_index().ver_hash, other._get_diff_index().ver_hash)
+        self.assertFalse(vt.diff(other))
+
+    def test_diff_index_is_lazy(self):
+        vt, other = _init_tracker(), _init_tracker()
+        self.assertIsNone(vt._diff_index)
+        self.assertFalse(vt.diff(other))
+
+        # Once built, the index is kept up to date by add.
+        vt.add('w', {'1': 'c', '3': 'a'})
+        vt.add('v', {})
+        fresh = DiffIndex(vt)
+        self.assertListEqual(fresh.ver_hash, vt._diff_index.ver_hash)
+        self.assertListEqual(fresh.node_keys, vt._diff_index.node_keys)
+        self.assertSetEqual({'v'}, vt._diff_index.absent_uids)
+        self.assertSetEqual({'v', 'w'}, vt.diff(other).uids)
+
+    def test_diff(self):
+        vt = _init_tracker()
+        other = VTracker(('1', '2', '3'))
+        other.add('x', {'1': 'a', '2': 'a'})
+        other.add('y', {'2': 'b', '3': 'c'})
+        other.add('w', {'2': 'b'})
+        mis = vt.str_na
+
+        diff = vt.diff(other)
+        self.assertTrue(diff)
+        self.assertSetEqual({'y', 'z', 'w'}, diff.uids)
+        self.assertSetEqual({('1', mis), ('2', 'b'), ('3', 'a'), ('3', 'c'), ('3', mis)}, diff.nodes)
+        self.assertSetEqual({(('1', mis), ('2', 'b')), (('2', 'b'), ('3', 'a')),
+                             (('2', 'b'), ('3', 'c')), (('2', 'b'), ('3', mis))}, diff.edges)
+        self.assertFalse(vt.diff(vt.freeze()))
+
+    def test_diff_swapped_states(self):
+        vt = VTracker(('1', '2'))
+        vt.add('x', {'1': 'a', '2': 'a'})
+        vt.add('y', {'1': 'a', '2': 'b'})
+        other = VTracker(('1', '2'))
+        other.add('x', {'1': 'a', '2': 'b'})
+        other.add('y', {'1': 'a', '2': 'a'})
+        self.assertNotEqual(vt._get_diff_index().ver_hash[1], other._get_diff_index().ver_hash[1])
+        self.assertEqual(vt._get_diff_index().ver_hash[0], other._get_diff_index().ver_hash[0])
+        diff = vt.diff(other)
+        self.assertSetEqual({'x', 'y'}, diff.uids)
+        self.assertSetEqual({('2', 'a'), ('2', 'b')}, diff.nodes)
+
+    def test_diff_only_visits_changed_versions(self):
+        vt, other = _init_tracker(), _init_tracker()
+        vt.add('w', {'1': 'c'})
+        other.add('w', {'1': 'd'})
+
+        # Only the nodes which changed are visited.
+        vt.diff(other)
+        visited = list()
+        get_node = vt._graph.get_node
+        vt._graph.get_node = lambda key: visited.append(key) or get_node(key)
+        diff = vt.diff(other)
+        self.assertSetEqual({('1', 'c'), ('1', 'd')}, set(visited))
+        self.assertSetEqual({('1', 'c'), ('1', 'd')}, diff.nodes)
+        self.assertSetEqual({(('1', 'c'), ('2', vt.str_na)), (('1', 'd'), ('2', vt.str_na))}, diff.edges)
+        self.assertSetEqual({'w'}, diff.uids)
+
+    def test_diff_different_versions(self):
+        vt = _init_tracker()
+        other = VTracker(('1', '2'))
+        other.add('x', {'1': 'a', '2': 'a'})
+        diff = diff_trackers(vt, other)
+        self.assertSetEqual({'x', 'y', 'z'}, diff.uids)
+        self.assertIn(('3', vt.str_na), diff.nodes)
+
+    def test_diff_one_added_uid(self):
+        versions = tuple(str(i) for i in range(10))
+        rng = random.Random(0)
+        rows = [('u%d' % i, {v: 's%d' % rng.randrange(50) for v in versions if rng.random() < 0.9})
+                for i in range(2000)]
+        vt, other = VTracker(versions), VTracker(versions)
+        for uid, ver_states in rows:
+            vt.add(uid, ver_states)
+            other.add(uid, ver_states)
+        other.add('new', {'1': 's0', '2': 's1'})
+
+        # Only the two nodes which gained the uid are visited.
+        vt._get_diff_index()
+        visited = list()
+        get_node = vt._graph.get_node
+        vt._graph.get_node = lambda key: visited.append(key) or get_node(key)
+        diff = vt.diff(other)
+        self.assertSetEqual({('1', 's0'), ('2', 's1')}, set(visited))
+        self.assertSetEqual({'new'}, diff.uids)
+        self.assertSetEqual({('1', 's0'), ('2', 's1')} | {(v, vt.str_na) for v in versions if v not in '12'},
+                            diff.nodes)
@@ -0,0 +1,151 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+"""Differential tests which compare the output of every available engine.
+
+Randomised trackers are exported by each engine, the outputs are normalised
+(highlight ids sorted) and must be identical to the reference Python output.
+Set VTRACKER_DIFF_SEEDS to increase the number of randomised trackers.
+"""
+
+import asyncio
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import unittest
+
+from vtracker import VTracker
+from vtracker.columnar import columns_to_sankey_json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+N_SEEDS = int(os.environ.get('VTRACKER_DIFF_SEEDS', 25))
+
+
+def random_tracker(seed, max_versions=10, max_uids=300):
+    """Generate a random tracker with missing states and churn.
+
+    Returns
+    -------
+    Tuple[Tuple[str], List[Tuple[str, Dict[str, str]]]]
+        The versions, and the (uid, ver_states) to add in order.
+    """
+    rng = random.Random(seed)
+    versions = tuple('R%d' % i for i in range(rng.randint(1, max_versions)))
+    n_states = rng.randint(1, 20)
+    p_missing = rng.random() * 0.5
+    p_churn = rng.random()
+
+    rows = list()
+    for i in range(rng.randint(0, max_uids)):
+        ver_states = dict()
+        state = rng.randrange(n_states)
+        for ver in versions:
+            if rng.random() < p_churn:
+                state = rng.randrange(n_states)
+            if rng.random() >= p_missing:
+                ver_states[ver] = 's__Genus species_%d' % state
+        rows.append(('G%06d' % i, ver_states))
+    return versions, rows
+
+
+def normalise(sankey_json):
+    """Sort the highlight ids and records so that outputs can be compared."""
+    out = dict()
+    for section in ('nodes', 'links'):
+        records = list()
+        for record in sankey_json[section]:
+            record = dict(record)
+            record['linkHighlightId'] = sorted(record['linkHighlightId'])
+            record['nodeHighlightId'] = sorted(record['nodeHighlightId'])
+            records.append(record)
+        out[section] = sorted(records, key=lambda r: r['id'])
+    return out
+
+
+def _build(versions, rows):
+    vt = VTracker(versions)
+    for uid, ver_states in rows:
+        vt.add(uid, ver_states)
+    return vt
+
+
+def engine_python(versions, rows):
+    return _build(versions, rows).as_sankey_json()
+
+
+def engine_frozen(versions, rows):
+    return _build(versions, rows).freeze().as_sankey_json()
+
+
+def engine_columnar(versions, rows):
+    return columns_to_sankey_json(_build(versions, rows).as_sankey_columns())
+
+
+def engine_async(versions, rows):
+    vt = _build(versions, rows)
+
+    async def run():
+        out = {'links': list(), 'nodes': list()}
+        async for section, records in vt.iter_sankey_json_async(chunk_size=7):
+            out[section].extend(records)
+        return out
+
+    return asyncio.run(run())
+
+
+def engine_spill(versions, rows):
+    fh = io.StringIO()
+    _build(versions, rows).write_sankey_json(fh, max_ids=64)
+    return json.loads(fh.getvalue())
+
+
+def engine_rust(versions, rows):
+    lines = ['\t'.join(versions)]
+    for uid, ver_states in rows:
+        lines.append('\t'.join([uid] + [ver_states.get(v, '') for v in versions]))
+    proc = subprocess.run(['cargo', 'run', '--quiet', '--bin', 'vtracker_sankey'],
+                          input='\n'.join(lines) + '\n', cwd=ROOT, check=True,
+                          stdout=subprocess.PIPE, universal_newlines=True)
+    return json.loads(proc.stdout)
+
+
+PYTHON_ENGINES = (('frozen', engine_frozen),
+                  ('columnar', engine_columnar),
+                  ('async', engine_async),
+                  ('spill', engine_spill))
+
+
+class TestDifferential(unittest.TestCase):
+
+    def assertEnginesEqual(self, engines):
+        for seed in range(N_SEEDS):
+            versions, rows = random_tracker(seed)
+            expected = normalise(engine_python(versions, rows))
+            for name, engine in engines:
+                with self.subTest(engine=name, seed=seed):
+                    self.assertDictEqual(expected, normalise(engine(versions, rows)))
+
+    def test_python_engines(self):
+        self.assertEnginesEqual(PYTHON_ENGINES)
+
+    @unittest.skipIf(shutil.which('cargo') is None, 'Cargo is not installed.')
+    def test_rust_engine(self):
+        subprocess.run(['cargo', 'build', '--quiet', '--bin', 'vtracker_sankey'], cwd=ROOT, check=True)
+        self.assertEnginesEqual((('rust', engine_rust),))
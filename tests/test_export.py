@@ -0,0 +1,64 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from vtracker import VTracker
+from tests.test_differential import random_tracker
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write_sankey_json(self):
+        vt = VTracker(('1', '2', '3'))
+        vt.add('x', {'1': 'a', '2': 'a'})
+        vt.add('y', {'2': 'b', '3': 'a'})
+        vt.add('z', {'2': 'b'})
+        for max_ids in (1, 5, 1000):
+            fh = io.StringIO()
+            vt.write_sankey_json(fh, max_ids=max_ids, tmp_dir=self.tmp_dir)
+            self.assertEqual(json.dumps(vt.as_sankey_json()), fh.getvalue())
+        self.assertListEqual([], os.listdir(self.tmp_dir))
+
+    def test_write_sankey_json_random(self):
+        for seed in range(10):
+            versions, rows = random_tracker(seed)
+            vt = VTracker(versions)
+            for uid, ver_states in rows:
+                vt.add(uid, ver_states)
+            fh = io.StringIO()
+            vt.write_sankey_json(fh, max_ids=50, tmp_dir=self.tmp_dir)
+            self.assertEqual(json.dumps(vt.as_sankey_json()), fh.getvalue())
+
+    def test_write_sankey_json_empty(self):
+        fh = io.StringIO()
+        VTracker(('1', '2')).write_sankey_json(fh)
+        self.assertEqual(json.dumps(VTracker(('1', '2')).as_sankey_json()), fh.getvalue())
+
+    def test_write_sankey_json_raises_ValueError(self):
+        self.assertRaises(ValueError, VTracker(('1',)).write_sankey_json, io.StringIO(), 0)
@@ -61,6 +61,14 @@ class TestGraph(unittest.TestCase):
 
         self.assertIsNone(g.get_node('x'))
 
+    def test_get_node_key(self):
+        g = Graph()
+        g.add_node('a')
+        g.add_node('b')
+        g.add_node('a')
+        self.assertEqual('a', g.get_node_key(0))
+        self.assertEqual('b', g.get_node_key(1))
+
     def test_add_edge(self):
         g = Graph()
         g.add_node('a', attrs={'x': True})
@@ -0,0 +1,68 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+"""Import-time benchmarks, these run in a fresh interpreter to avoid caching."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous limits (in microseconds) to catch regressions rather than noise.
+MAX_IMPORT_US = 5000
+MAX_CLI_IMPORT_US = 150000
+
+
+def _import_times(code):
+    """Run code in a fresh interpreter, returning the cumulative import time of each module."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    out = dict()
+    for line in proc.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                out[name.strip()] = int(cumulative)
+    return out
+
+
+class TestImport(unittest.TestCase):
+
+    def test_import_vtracker(self):
+        times = _import_times('import vtracker')
+        self.assertNotIn('vtracker.vtracker', times)
+        self.assertLess(times['vtracker'], MAX_IMPORT_US)
+
+    def test_cli_version(self):
+        times = _import_times('import sys; sys.argv = ["vtracker", "--version"]; '
+                              'from vtracker.cli import main; main()')
+        for module in ('vtracker.vtracker', 'vtracker.batch', 'multiprocessing', 'numpy'):
+            self.assertNotIn(module, times)
+        self.assertLess(times['vtracker.cli'], MAX_CLI_IMPORT_US)
+
+    def test_core_is_standard_library(self):
+        times = _import_times('from vtracker import VTracker')
+        self.assertIn('vtracker.vtracker', times)
+        for module in ('numpy', 'asyncio', 'multiprocessing', 'hashlib', 'vtracker.columnar', 'vtracker.aio',
+                       'vtracker.diff', 'vtracker.reachability', 'vtracker.transition'):
+            self.assertNotIn(module, times)
+        if hasattr(sys, 'stdlib_module_names'):
+            imported = set(times) - set(_import_times('pass'))
+            third_party = {m.split('.')[0] for m in imported} - set(sys.stdlib_module_names) - {'vtracker'}
+            self.assertSetEqual(set(), third_party)
@@ -0,0 +1,66 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from vtracker import VTracker
+from vtracker.exceptions import ConflictingState, MissingVersion
+from vtracker.ingest import iter_grouped_rows
+
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.rows = [('y', '3', 'a'), ('x', '1', 'a'), ('z', '2', 'b'),
+                     ('y', '2', 'b'), ('x', '2', 'a')]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_iter_grouped_rows(self):
+        expected = [('x', {'1': 'a', '2': 'a'}),
+                    ('y', {'2': 'b', '3': 'a'}),
+                    ('z', {'2': 'b'})]
+        for max_rows in (1, 2, 100):
+            self.assertListEqual(expected, list(iter_grouped_rows(self.rows, max_rows, self.tmp_dir)))
+        self.assertListEqual([], os.listdir(self.tmp_dir))
+
+    def test_iter_grouped_rows_raises_ConflictingState(self):
+        rows = self.rows + [('x', '1', 'a'), ('x', '1', 'b')]
+        self.assertRaises(ConflictingState, list, iter_grouped_rows(rows, 2, self.tmp_dir))
+        self.assertListEqual([], os.listdir(self.tmp_dir))
+
+    def test_add_rows(self):
+        expected = VTracker(('1', '2', '3'))
+        expected.add('x', {'1': 'a', '2': 'a'})
+        expected.add('y', {'2': 'b', '3': 'a'})
+        expected.add('z', {'2': 'b'})
+
+        rows = list(self.rows)
+        random.Random(0).shuffle(rows)
+        vt = VTracker(('1', '2', '3'))
+        vt.add_rows(iter(rows), max_rows=2, tmp_dir=self.tmp_dir)
+        self.assertDictEqual(expected.as_sankey_json(), vt.as_sankey_json())
+
+    def test_add_rows_raises_MissingVersion(self):
+        vt = VTracker(('1', '2', '3'))
+        self.assertRaises(MissingVersion, vt.add_rows, [('x', '9', 'a')])
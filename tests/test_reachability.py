@@ -0,0 +1,82 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import random
+import time
+import unittest
+
+from vtracker.reachability import Reachability
+
+# A generous limit (in seconds) to catch regressions rather than noise.
+MAX_BUILD_S = 30
+
+
+def _bfs(edges, start):
+    seen, stack = set(), [start]
+    while stack:
+        for nxt in edges.get(stack.pop(), ()):
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return sorted(seen)
+
+
+class TestReachability(unittest.TestCase):
+
+    def test_diamond(self):
+        r = Reachability([[0], [1, 2], [3]], [(0, 1), (0, 2), (1, 3), (2, 3)])
+        self.assertListEqual([1, 2, 3], r.descendants(0))
+        self.assertListEqual([0, 1, 2], r.ancestors(3))
+        self.assertListEqual([0], r.ancestors(1))
+        self.assertListEqual([], r.descendants(3))
+        self.assertTrue(r.is_ancestor(0, 3))
+        self.assertFalse(r.is_ancestor(1, 2))
+
+    def test_random_layered(self):
+        rng = random.Random(0)
+        layers = [list(range(i * 10, (i + 1) * 10)) for i in range(6)]
+        edges = set()
+        for layer_from, layer_to in zip(layers, layers[1:]):
+            for _ in range(15):
+                edges.add((rng.choice(layer_from), rng.choice(layer_to)))
+        r = Reachability(layers, edges)
+
+        edges_out, edges_in = dict(), dict()
+        for a, b in edges:
+            edges_out.setdefault(a, list()).append(b)
+            edges_in.setdefault(b, list()).append(a)
+        for node_id in range(60):
+            self.assertListEqual(_bfs(edges_out, node_id), r.descendants(node_id))
+            self.assertListEqual(_bfs(edges_in, node_id), r.ancestors(node_id))
+            for other_id in range(60):
+                self.assertEqual(other_id in _bfs(edges_out, node_id), r.is_ancestor(node_id, other_id))
+
+    def test_scaling(self):
+        # 100,000 nodes in 20 layers, each node has a single parent and child.
+        n_layers, width = 20, 5000
+        layers = [list(range(i * width, (i + 1) * width)) for i in range(n_layers)]
+        layers = [layer[::-1] if i % 2 else layer for i, layer in enumerate(layers)]
+        edges = [(a, b) for layer_from, layer_to in zip(layers, layers[1:]) for a, b in zip(layer_from, layer_to)]
+
+        start = time.perf_counter()
+        r = Reachability(layers, edges)
+        self.assertLess(time.perf_counter() - start, MAX_BUILD_S)
+
+        # Each layer holds a single reachable node, so each bitset is a single bit.
+        for bases, bits in r._ancestors + r._descendants:
+            self.assertSetEqual({1}, set(bits) or {1})
+        self.assertListEqual([layer[0] for layer in layers[1:]], r.descendants(layers[0][0]))
@@ -0,0 +1,74 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from operator import itemgetter
+from unittest import mock
+
+from vtracker import runs
+
+
+class TestRuns(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write_read_run(self):
+        rows = [(1, 'a\tb\n'), (2, '{"x": [1, 2]}')]
+        path = runs.write_run(rows, self.tmp_dir)
+        self.assertListEqual(rows, list(runs.read_run(path)))
+
+    def test_merge_runs(self):
+        rows = [(i % 7, i) for i in range(20)]
+        paths = [runs.spill(rows[i:i + 5], itemgetter(0), self.tmp_dir) for i in range(0, 15, 5)]
+        merged = list(runs.merge_runs(paths, rows[15:], itemgetter(0), self.tmp_dir))
+
+        # Equal keys keep the order of the runs, followed by the in-memory rows.
+        self.assertListEqual(sorted(rows, key=itemgetter(0)), merged)
+
+    def test_merge_runs_bounded_fan_in(self):
+        rows = [(i, str(i)) for i in range(50)]
+        random.Random(0).shuffle(rows)
+
+        # Track the number of runs which are open at once.
+        n_open, max_open = [0], [0]
+        read_run = runs.read_run
+
+        def counting_read_run(path):
+            n_open[0] += 1
+            max_open[0] = max(max_open[0], n_open[0])
+            try:
+                yield from read_run(path)
+            finally:
+                n_open[0] -= 1
+
+        with mock.patch.object(runs, '_MERGE_FAN_IN', 4), \
+                mock.patch.object(runs, 'read_run', counting_read_run):
+            paths = [runs.spill([row], itemgetter(0), self.tmp_dir) for row in rows[:-1]]
+            merged = list(runs.merge_runs(paths, rows[-1:], itemgetter(0), self.tmp_dir))
+        self.assertListEqual(sorted(rows), merged)
+        self.assertLessEqual(max_open[0], 4)
+
+        # Intermediate runs are removed, the final runs are left to the caller.
+        self.assertLess(len(os.listdir(self.tmp_dir)), 4)
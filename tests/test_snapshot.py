@@ -0,0 +1,141 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import random
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from vtracker import VTracker
+from vtracker.exceptions import ImmutableTracker, MissingVersion
+from vtracker.snapshot import FrozenVTracker, VTrackerPublisher
+
+
+class TestFrozenVTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.vt = VTracker(('1', '2', '3'))
+        self.vt.add('x', {'1': 'a', '2': 'a'})
+        self.vt.add('y', {'2': 'b', '3': 'a'})
+        self.vt.add('z', {'2': 'b'})
+
+    def test_freeze(self):
+        frozen = self.vt.freeze()
+        self.assertIsInstance(frozen, FrozenVTracker)
+        self.assertIs(frozen, frozen.freeze())
+        self.assertDictEqual(self.vt.as_sankey_json(), frozen.as_sankey_json())
+
+    def test_freeze_copies_all_state(self):
+        frozen = self.vt.freeze()
+        self.assertSetEqual(set(vars(self.vt)), set(vars(frozen)) - {'_uid_paths', 'str_na'})
+        for name, value in vars(self.vt).items():
+            if isinstance(value, dict) and name not in VTracker._caches:
+                self.assertIsNot(value, getattr(frozen, name))
+        self.assertIsInstance(frozen._uid_to_node['x'], tuple)
+        self.assertIsInstance(frozen._graph.get_node(('1', 'a')).attrs['uid'], frozenset)
+        self.assertListEqual(list(self.vt._ver_node_ids[1]), list(frozen._ver_node_ids[1]))
+
+    def test_freeze_is_isolated(self):
+        frozen = self.vt.freeze()
+        expected = frozen.as_sankey_json()
+        self.vt.add('w', {'1': 'c', '3': 'c'})
+        self.assertDictEqual(expected, frozen.as_sankey_json())
+        self.assertNotIn('w', frozen._uid_to_node)
+
+    def test_add_raises_ImmutableTracker(self):
+        frozen = self.vt.freeze()
+        self.assertRaises(ImmutableTracker, frozen.add, 'w', {'1': 'a'})
+
+    def test_concurrent_queries(self):
+        frozen = self.vt.freeze()
+        expected = self.vt.as_sankey_json()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: frozen.as_sankey_json(), range(32)))
+        for result in results:
+            self.assertDictEqual(expected, result)
+
+    def test_single_version(self):
+        vt = VTracker(('1',))
+        vt.add('x', {'1': 'a'})
+        frozen = vt.freeze()
+        self.assertDictEqual(vt.as_sankey_json(), frozen.as_sankey_json())
+
+
+class TestVTrackerPublisher(unittest.TestCase):
+
+    def test_publish(self):
+        pub = VTrackerPublisher(('1', '2'))
+        self.assertEqual(0, pub.epoch)
+        self.assertDictEqual({'links': [], 'nodes': []}, pub.snapshot.as_sankey_json())
+
+        pub.add('x', {'1': 'a', '2': 'a'})
+        self.assertEqual(0, len(pub.snapshot._uid_to_node))
+
+        epoch, snapshot = pub.publish()
+        self.assertEqual(1, epoch)
+        self.assertEqual((epoch, snapshot), pub.current())
+        self.assertSetEqual({'x'}, set(snapshot._uid_to_node))
+
+        pub.add('y', {'1': 'a'})
+        self.assertSetEqual({'x'}, set(snapshot._uid_to_node))
+        self.assertEqual(2, pub.publish()[0])
+        self.assertSetEqual({'x', 'y'}, set(pub.snapshot._uid_to_node))
+
+    def test_add_raises_MissingVersion(self):
+        pub = VTrackerPublisher(('1', '2'))
+        self.assertRaises(MissingVersion, pub.add, 'x', {'9': 'a'})
+
+    def test_publish_is_incremental(self):
+        pub = VTrackerPublisher(('1', '2', '3'))
+        pub.add('x', {'1': 'a', '2': 'a'})
+        pub.add('y', {'2': 'b', '3': 'a'})
+        _, previous = pub.publish()
+        expected = previous.as_sankey_json()
+
+        pub.add('z', {'2': 'b', '3': 'c'})
+        _, snapshot = pub.publish()
+
+        # Nodes and edges which didn't change are shared with the previous snapshot.
+        self.assertIs(previous._graph.get_node(('1', 'a')), snapshot._graph.get_node(('1', 'a')))
+        self.assertIsNot(previous._graph.get_node(('2', 'b')), snapshot._graph.get_node(('2', 'b')))
+        self.assertIs(previous._graph.get_edge(('1', 'a'), ('2', 'a')).attrs,
+                      snapshot._graph.get_edge(('1', 'a'), ('2', 'a')).attrs)
+        self.assertDictEqual(expected, previous.as_sankey_json())
+
+    def test_publish_matches_freeze(self):
+        versions = ('1', '2', '3', '4')
+        rng = random.Random(0)
+        pub = VTrackerPublisher(versions)
+        for i in range(300):
+            pub.add(i, {v: rng.choice('abcd') for v in versions if rng.random() < 0.8})
+            if i % 37 == 0:
+                pub.publish()
+        _, snapshot = pub.publish()
+
+        expected = pub._tracker.freeze()
+        self.assertDictEqual(expected.as_sankey_json(), snapshot.as_sankey_json())
+        self.assertDictEqual(expected._uid_to_node, snapshot._uid_to_node)
+        for node in expected._graph.iter_nodes():
+            other = snapshot._graph.get_node(node._key)
+            self.assertEqual(node.attrs, other.attrs)
+            self.assertSetEqual(node._edges_out, other._edges_out)
+            self.assertSetEqual(node._edges_in, other._edges_in)
+        for edge in expected._graph.iter_edges():
+            other = snapshot._graph.get_edge(edge._from_node._key, edge._to_node._key)
+            self.assertEqual(edge.attrs, other.attrs)
+            self.assertIs(other._from_node, snapshot._graph.get_node(edge._from_node._key))
+            self.assertIs(other._to_node, snapshot._graph.get_node(edge._to_node._key))
+        self.assertListEqual(expected.ancestors('4', 'a'), snapshot.ancestors('4', 'a'))
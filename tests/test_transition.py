@@ -0,0 +1,46 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import unittest
+
+from vtracker.graph import Graph
+from vtracker.transition import TransitionMatrix
+
+
+class TestTransitionMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = Graph()
+        for key in (('1', 'a'), ('1', 'b'), ('2', 'c'), ('2', 'd')):
+            self.graph.add_node(key)
+
+    def test_from_columns(self):
+        tm = TransitionMatrix.from_columns('1', '2', [0, 0, 1, 0], [2, 3, 3, 2], self.graph)
+        self.assertEqual('1', tm.ver_from)
+        self.assertEqual('2', tm.ver_to)
+        self.assertTupleEqual(('a', 'b'), tm.sources)
+        self.assertTupleEqual(('c', 'd'), tm.targets)
+        self.assertTupleEqual((2, 2), tm.shape)
+        self.assertDictEqual({(0, 0): 2, (0, 1): 1, (1, 1): 1}, tm.counts)
+        self.assertListEqual([[2, 1], [0, 1]], tm.to_dense())
+        self.assertListEqual([('a', 'c', 2), ('a', 'd', 1), ('b', 'd', 1)], list(tm.items()))
+
+    def test_get(self):
+        tm = TransitionMatrix.from_columns('1', '2', [0, 0, 1], [2, 3, 3], self.graph)
+        self.assertEqual(1, tm.get('a', 'c'))
+        self.assertEqual(0, tm.get('b', 'c'))
+        self.assertEqual(0, tm.get('x', 'c'))
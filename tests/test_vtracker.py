@@ -16,9 +16,11 @@
 ###############################################################################
 
 import unittest
+from unittest import mock
 
 from vtracker import VTracker
-from vtracker.exceptions import MissingVersion, DuplicateEntity
+from vtracker.vtracker import HIGHLIGHT_ALL
+from vtracker.exceptions import MissingVersion, DuplicateEntity, MissingState
 
 
 class TestVTracker(unittest.TestCase):
@@ -28,7 +30,6 @@ class TestVTracker(unittest.TestCase):
         self.assertDictEqual({'a': 0, 'b': 1, 'c': 2}, vt._ver_to_idx)
         self.assertTupleEqual(('a', 'b', 'c'), vt._idx_to_ver)
         self.assertEqual(0, len(vt._uid_to_node))
-        self.assertEqual(0, len(vt._uid_to_edge))
 
     def test_add(self):
         """
@@ -98,27 +99,111 @@ class TestVTracker(unittest.TestCase):
         self.assertSetEqual(e_2b_3a.attrs['uid'], {'y'})
 
         # Check the node indices
-        self.assertSetEqual(vt._uid_to_node['x'], {('1', 'a'), ('2', 'a'), ('3', mis)})
-        self.assertSetEqual(vt._uid_to_node['y'], {('1', mis), ('2', 'b'), ('3', 'a')})
-        self.assertSetEqual(vt._uid_to_node['z'], {('1', mis), ('2', 'b'), ('3', mis)})
-
-        # Check the edge indices
-        self.assertSetEqual(vt._uid_to_edge['x'], {(('1', 'a'), ('2', 'a')),
-                                                   (('2', 'a'), ('3', mis))})
-        self.assertSetEqual(vt._uid_to_edge['y'], {(('1', mis), ('2', 'b')),
-                                                   (('2', 'b'), ('3', 'a'))})
-        self.assertSetEqual(vt._uid_to_edge['z'], {(('1', mis), ('2', 'b')),
-                                                   (('2', 'b'), ('3', mis))})
+        self.assertTupleEqual(vt._uid_to_node['x'], (('1', 'a'), ('2', 'a'), ('3', mis)))
+        self.assertTupleEqual(vt._uid_to_node['y'], (('1', mis), ('2', 'b'), ('3', 'a')))
+        self.assertTupleEqual(vt._uid_to_node['z'], (('1', mis), ('2', 'b'), ('3', mis)))
+
+        # Check the edges of each uid
+        self.assertTupleEqual(vt._get_uid_edges('x'), ((('1', 'a'), ('2', 'a')),
+                                                       (('2', 'a'), ('3', mis))))
+        self.assertTupleEqual(vt._get_uid_edges('y'), ((('1', mis), ('2', 'b')),
+                                                       (('2', 'b'), ('3', 'a'))))
+        self.assertTupleEqual(vt._get_uid_edges('z'), ((('1', mis), ('2', 'b')),
+                                                       (('2', 'b'), ('3', mis))))
 
     def test_add_raises_MissingVersion(self):
         vt = VTracker(('1', '2', '3'))
         self.assertRaises(MissingVersion, vt.add, 'x', {'1': 'a', '9': 'a'})
+        self.assertEqual(0, len(vt._uid_to_node))
+        self.assertEqual(0, len(vt._graph._nodes))
+
+    def test_add_single_version(self):
+        vt = VTracker(('1',))
+        vt.add('x', {'1': 'a'})
+        vt.add('y', {})
+        self.assertTupleEqual((('1', 'a'),), vt._uid_to_node['x'])
+        self.assertTupleEqual((('1', vt.str_na),), vt._uid_to_node['y'])
+        self.assertEqual(0, len(vt._graph._edges))
+        self.assertTupleEqual((), vt._get_uid_edges('x'))
 
     def test_add_raises_DuplicateEntity(self):
         vt = VTracker(('1', '2', '3'))
         vt.add('x', {'1': 'a', '2': 'a', '3': 'a'})
         self.assertRaises(DuplicateEntity, vt.add, 'x', {'1': 'a'})
 
+    def test_transition_matrix(self):
+        vt = VTracker(('1', '2', '3'))
+        vt.add('x', {'1': 'a', '2': 'a'})
+        vt.add('y', {'2': 'b', '3': 'a'})
+        vt.add('z', {'2': 'b'})
+        mis = vt.str_na
+
+        tm = vt.transition_matrix('1', '3')
+        self.assertListEqual([('a', mis, 1), (mis, mis, 1), (mis, 'a', 1)], list(tm.items()))
+        self.assertIs(tm, vt.transition_matrix('1', '3'))
+
+        # Adding invalidates the cache.
+        vt.add('w', {'1': 'a', '3': 'a'})
+        self.assertEqual(1, vt.transition_matrix('1', '3').get('a', 'a'))
+        self.assertEqual(1, vt.freeze().transition_matrix('1', '3').get('a', 'a'))
+        self.assertRaises(MissingVersion, vt.transition_matrix, '1', '9')
+
+    def test_select_versions(self):
+        vt = VTracker(('1', '2', '3'))
+        vt.add('x', {'1': 'a', '2': 'a'})
+        vt.add('y', {'2': 'b', '3': 'a'})
+        vt.add('z', {'2': 'b'})
+        mis = vt.str_na
+
+        self.assertDictEqual(vt.as_sankey_json(), vt.select_versions(('1', '2', '3')).as_sankey_json())
+
+        sub = vt.select_versions(('1', '3'))
+        self.assertTupleEqual(('1', '3'), sub._idx_to_ver)
+        self.assertTupleEqual(((('1', 'a'), ('3', mis)),), sub._get_uid_edges('x'))
+        self.assertTupleEqual(((('1', mis), ('3', 'a')),), sub._get_uid_edges('y'))
+        self.assertTupleEqual(((('1', mis), ('3', mis)),), sub._get_uid_edges('z'))
+        self.assertRaises(MissingVersion, vt.select_versions, ('1', '9'))
+
+        # Reading an unknown uid must not insert it and misalign the columns.
+        self.assertNotIn('w', vt._uid_to_node)
+        self.assertRaises(KeyError, vt._uid_to_node.__getitem__, 'w')
+
+    def test_ancestors_descendants(self):
+        vt = VTracker(('1', '2', '3'))
+        vt.add('x', {'1': 'a', '2': 'a'})
+        vt.add('y', {'2': 'b', '3': 'a'})
+        vt.add('z', {'2': 'b'})
+        mis = vt.str_na
+
+        self.assertListEqual([('2', 'a')], vt.descendants('1', 'a'))
+        self.assertListEqual([('2', 'b')], vt.ancestors('3', 'a'))
+        self.assertListEqual([], vt.descendants('1', mis))
+        self.assertListEqual([], vt.ancestors('3', mis))
+        self.assertListEqual([], vt.ancestors('1', 'a'))
+
+        # Adding an entity along existing nodes and edges keeps the cache.
+        reachability = vt._reachability
+        vt.add('v', {'1': 'a', '2': 'a'})
+        self.assertIs(reachability, vt._reachability)
+
+        # Adding a new edge invalidates the cache.
+        vt.add('w', {'1': 'a', '2': 'b'})
+        self.assertIsNone(vt._reachability)
+        self.assertListEqual([('2', 'a'), ('2', 'b'), ('3', 'a')], vt.descendants('1', 'a'))
+        self.assertListEqual(vt.descendants('1', 'a'), vt.freeze().descendants('1', 'a'))
+
+        self.assertRaises(MissingVersion, vt.ancestors, '9', 'a')
+        self.assertRaises(MissingState, vt.descendants, '1', 'x')
+
+    def test_ancestors_descendants_not_present(self):
+        # Uids which are absent at a version don't link unrelated states.
+        vt = VTracker(('R1', 'R2', 'R3'))
+        vt.add('g1', {'R1': 's__A', 'R2': 's__A', 'R3': 's__A'})
+        vt.add('g2', {'R1': 's__A'})
+        vt.add('g3', {'R3': 's__Unrelated'})
+        self.assertListEqual([('R2', 's__A'), ('R3', 's__A')], vt.descendants('R1', 's__A'))
+        self.assertListEqual([], vt.ancestors('R3', 's__Unrelated'))
+
     def test__build_uid_paths(self):
         """
         +--------------+--------+--------------+
@@ -290,3 +375,64 @@ class TestVTracker(unittest.TestCase):
         for exp_edge_id, exp_edge in edges_exp.items():
             test_edge = test_edges[exp_edge_id]
             self.assertDictEqual(exp_edge, test_edge)
+
+    def test_as_sankey_json_max_highlight(self):
+        vt = VTracker(('1', '2', '3'))
+        vt.add('x', {'1': 'a', '2': 'a', '3': 'a'})
+        vt.add('y', {'1': 'a', '2': 'b', '3': 'b'})
+        vt.add('z', {'1': 'a', '2': 'b', '3': 'c'})
+        exact = vt.as_sankey_json()
+
+        # Exact when the limit is not exceeded.
+        sankey_json = vt.as_sankey_json(max_highlight=100)
+        for test, exp in zip(sankey_json['nodes'] + sankey_json['links'], exact['nodes'] + exact['links']):
+            self.assertFalse(test['highlightTruncated'])
+            self.assertListEqual(sorted(exp['nodeHighlightId']), test['nodeHighlightId'])
+            self.assertListEqual(sorted(exp['linkHighlightId']), test['linkHighlightId'])
+
+        # Node ('1', 'a') contains every uid, so highlighting everything is exact.
+        node_1a = vt._graph.get_node(('1', 'a'))._node_id
+        test = vt.as_sankey_json(max_highlight=2)['nodes'][node_1a]
+        self.assertEqual(HIGHLIGHT_ALL, test['nodeHighlightId'])
+        self.assertEqual(HIGHLIGHT_ALL, test['linkHighlightId'])
+        self.assertFalse(test['highlightTruncated'])
+
+        # Node ('2', 'b') has 4 highlighted nodes (truncated to 3) and 3 highlighted links.
+        node_2b = vt._graph.get_node(('2', 'b'))._node_id
+        test = vt.as_sankey_json(max_highlight=3)['nodes'][node_2b]
+        self.assertTrue(test['highlightTruncated'])
+        self.assertListEqual(sorted(exact['nodes'][node_2b]['nodeHighlightId'])[:3], test['nodeHighlightId'])
+        self.assertListEqual(sorted(exact['nodes'][node_2b]['linkHighlightId']), test['linkHighlightId'])
+
+        # Node ('2', 'b') has more uids than the limit.
+        test = vt.as_sankey_json(max_highlight=1)['nodes'][node_2b]
+        self.assertEqual(HIGHLIGHT_ALL, test['nodeHighlightId'])
+        self.assertTrue(test['highlightTruncated'])
+
+        # Records above the limit highlight everything, the others keep exactly the lowest ids.
+        for limit in (1, 2, 3):
+            sankey_json = vt.as_sankey_json(max_highlight=limit)
+            for test, exp in zip(sankey_json['nodes'] + sankey_json['links'], exact['nodes'] + exact['links']):
+                if test.get('total', test.get('value')) > limit:
+                    self.assertEqual(HIGHLIGHT_ALL, test['nodeHighlightId'])
+                    self.assertEqual(HIGHLIGHT_ALL, test['linkHighlightId'])
+                    continue
+                self.assertListEqual(sorted(exp['nodeHighlightId'])[:limit], test['nodeHighlightId'])
+                self.assertListEqual(sorted(exp['linkHighlightId'])[:limit], test['linkHighlightId'])
+
+    def test_as_sankey_json_max_highlight_skips_paths(self):
+        vt = VTracker(('1', '2'))
+        vt.add('x', {'1': 'a', '2': 'a'})
+        vt.add('y', {'1': 'a', '2': 'a'})
+        vt.add('z', {'1': 'b', '2': 'b'})
+
+        # Only z is part of a record which is below the limit.
+        with mock.patch.object(vt, '_build_uid_paths', wraps=vt._build_uid_paths) as build:
+            vt.as_sankey_json(max_highlight=1)
+        build.assert_called_once_with({'z'})
+
+    def test_as_sankey_json_max_highlight_invalid(self):
+        vt = VTracker(('1', '2'))
+        vt.add('x', {'1': 'a', '2': 'a'})
+        for max_highlight in (0, -1):
+            self.assertRaises(ValueError, vt.as_sankey_json, max_highlight)
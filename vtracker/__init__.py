@@ -23,4 +23,13 @@ __author__ = 'Aaron Mussig'
 __author_email__ = 'aaronmussig@gmail.com'
 __license__ = 'GPL3'
 
-from .vtracker import VTracker
+__all__ = ['VTracker']
+
+
+def __getattr__(name):
+    """Import the tracker on first use, keeping `import vtracker` lightweight."""
+    if name == 'VTracker':
+        from .vtracker import VTracker
+        globals()['VTracker'] = VTracker
+        return VTracker
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
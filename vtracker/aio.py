@@ -0,0 +1,95 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Tuple, AsyncIterator, Iterator
+
+from .vtracker import VTracker
+
+
+def _take(iterator, n):
+    # type: (Iterator[dict], int) -> List[dict]
+    """Consume at most n records from an iterator."""
+    return list(islice(iterator, n))
+
+
+async def as_sankey_json_async(vt, executor=None):
+    # type: (VTracker, Optional[Executor]) -> Dict[str, List[dict]]
+    """Run as_sankey_json in an executor to avoid blocking the event loop.
+
+    Parameters
+    ----------
+    vt : VTracker
+        The tracker to export, this must not be modified during the export.
+    executor : Optional[Executor]
+        The executor to run the export in, None for the loop default.
+
+    Returns
+    -------
+    Dict[str, List[dict]]
+        A dictionary formatted for D3.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, vt.as_sankey_json)
+
+
+async def iter_sankey_json_async(vt, chunk_size=1000, executor=None):
+    # type: (VTracker, int, Optional[Executor]) -> AsyncIterator[Tuple[str, List[dict]]]
+    """Yield the D3 Sankey JSON in chunks, computed in an executor.
+
+    The executor must be able to share the generator state with the caller,
+    i.e. a thread pool or the loop default. Process pools are rejected, as
+    the generators can't be sent to another process.
+
+    Parameters
+    ----------
+    vt : VTracker
+        The tracker to export, this must not be modified during the export.
+    chunk_size : int
+        The maximum number of records in each chunk.
+    executor : Optional[Executor]
+        The executor to run the export in, None for the loop default.
+
+    Returns
+    -------
+    AsyncIterator[Tuple[str, List[dict]]]
+        Yields ('nodes' or 'links', records) for each chunk.
+
+    Raises
+    ------
+    ValueError
+        If the chunk size is less than one, or the executor is a
+        ProcessPoolExecutor.
+    """
+    if chunk_size < 1:
+        raise ValueError('The chunk size must be a positive integer.')
+    if isinstance(executor, ProcessPoolExecutor):
+        raise ValueError('Chunks can only be computed in a thread pool or the loop default executor, '
+                         'not a process pool.')
+    loop = asyncio.get_running_loop()
+    uid_travel_node_id, uid_travel_edge_id = await loop.run_in_executor(executor, vt._build_uid_paths)
+
+    sections = (('nodes', vt._iter_sankey_nodes(uid_travel_node_id, uid_travel_edge_id)),
+                ('links', vt._iter_sankey_links(uid_travel_node_id, uid_travel_edge_id)))
+    for section, records in sections:
+        while True:
+            chunk = await loop.run_in_executor(executor, _take, records, chunk_size)
+            if not chunk:
+                break
+            yield section, chunk
@@ -0,0 +1,246 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+from collections import defaultdict
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import __version__
+from .vtracker import VTracker
+
+MANIFEST = '.vtracker-manifest.tsv'
+
+# The index shared with worker processes, inherited copy-on-write when forked.
+_SHARED = None  # type: Optional[Tuple[Tuple[str], Dict[str, Dict[str, str]]]]
+
+
+def read_release(path):
+    # type: (str) -> Dict[str, str]
+    """Read the state of each uid in a release.
+
+    Parameters
+    ----------
+    path : str
+        A tab-separated file of uid and state, lines starting with # are ignored.
+
+    Returns
+    -------
+    Dict[str, str]
+        The state of each uid.
+
+    Raises
+    ------
+    ValueError
+        If a line doesn't contain a tab, the message includes the path and line number.
+    """
+    out = dict()
+    with open(path) as fh:
+        for line_no, line in enumerate(fh, 1):
+            line = line.rstrip('\r\n')
+            if not line or line.startswith('#'):
+                continue
+            cols = line.split('\t', 1)
+            if len(cols) != 2:
+                raise ValueError('%s:%d: Expected a tab-separated uid and state.' % (path, line_no))
+            uid, state = cols
+            out[uid] = state
+    return out
+
+
+def build_index(releases):
+    # type: (Iterable[Tuple[str, Dict[str, str]]]) -> Tuple[Tuple[str], Dict[str, Dict[str, str]], Dict[str, Set[str]]]
+    """Index the states of each uid, and the uids of each taxon (state).
+
+    Parameters
+    ----------
+    releases : Iterable[Tuple[str, Dict[str, str]]]
+        The version and uid states of each release, oldest to newest.
+
+    Returns
+    -------
+    Tuple[Tuple[str], Dict[str, Dict[str, str]], Dict[str, Set[str]]]
+        The versions, Dict[uid, Dict[version, state]], Dict[taxon, Set[uid]]
+        where a taxon contains every uid which had that state in any release.
+    """
+    versions = list()
+    uid_states = defaultdict(dict)
+    taxon_uids = defaultdict(set)
+    for version, states in releases:
+        versions.append(version)
+        for uid, state in states.items():
+            uid_states[uid][version] = state
+            taxon_uids[state].add(uid)
+    return tuple(versions), dict(uid_states), dict(taxon_uids)
+
+
+def taxon_file_name(taxon):
+    # type: (str) -> str
+    """A unique and filesystem safe name for the output of a taxon."""
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '_', taxon).strip('._') or '_'
+    if slug != taxon:
+        slug = '%s-%s' % (slug, hashlib.sha1(taxon.encode('utf-8')).hexdigest()[:8])
+    return slug + '.json'
+
+
+def taxon_hash(versions, uid_states, uids):
+    # type: (Tuple[str], Dict[str, Dict[str, str]], Iterable[str]) -> str
+    """A hash of every input which affects the output of a taxon."""
+    h = hashlib.sha1()
+    h.update(json.dumps([__version__, versions]).encode('utf-8'))
+    for uid in sorted(uids):
+        h.update(json.dumps([uid, [uid_states[uid].get(v) for v in versions]]).encode('utf-8'))
+    return h.hexdigest()
+
+
+def write_atomic(path, data):
+    # type: (str, str) -> None
+    """Write a file so that it is either fully written or not present."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _manifest_line(taxon_hash_, taxon):
+    # type: (str, str) -> str
+    """A line of the manifest, the taxon is JSON encoded to escape tabs and newlines."""
+    return '%s\t%s\n' % (taxon_hash_, json.dumps(taxon))
+
+
+def read_manifest(out_dir):
+    # type: (str) -> Dict[str, str]
+    """Read the hash of each taxon previously written to the output directory.
+
+    Lines which can't be parsed (e.g. partly written) are ignored, those taxa
+    are written again.
+    """
+    out = dict()
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.isfile(path):
+        with open(path) as fh:
+            for line in fh:
+                cols = line.rstrip('\n').split('\t', 1)
+                if len(cols) != 2:
+                    continue
+                try:
+                    taxon = json.loads(cols[1])
+                except ValueError:
+                    continue
+                if isinstance(taxon, str):
+                    out[taxon] = cols[0]
+    return out
+
+
+def _init_worker(shared):
+    """Set the shared index in workers which were not forked."""
+    global _SHARED
+    _SHARED = shared
+
+
+def _export_taxon(job):
+    # type: (Tuple[str, List[str], str]) -> str
+    """Build and write the Sankey JSON of a single taxon."""
+    taxon, uids, path = job
+    versions, uid_states = _SHARED
+    vt = VTracker(versions)
+    for uid in uids:
+        vt.add(uid, uid_states[uid])
+    write_atomic(path, json.dumps(vt.as_sankey_json()))
+    return taxon
+
+
+def _run_jobs(jobs, hashes, versions, uid_states, out_dir, processes=None):
+    # type: (List[Tuple[str, List[str], str]], Dict[str, str], Tuple[str], Dict[str, Dict[str, str]], str, Optional[int]) -> None
+    """Export each taxon in a process pool, recording each in the manifest once written."""
+    global _SHARED
+
+    # Forked workers inherit the index without it being copied or pickled.
+    _SHARED = (versions, uid_states)
+    if 'fork' in multiprocessing.get_all_start_methods():
+        pool = multiprocessing.get_context('fork').Pool(processes)
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, (_SHARED,))
+
+    try:
+        with open(os.path.join(out_dir, MANIFEST), 'a') as fh:
+            for taxon in pool.imap_unordered(_export_taxon, jobs, chunksize=16):
+                fh.write(_manifest_line(hashes[taxon], taxon))
+                fh.flush()
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+        _SHARED = None
+
+
+def export_taxa(versions, uid_states, taxon_uids, out_dir, taxa=None, processes=None, force=False):
+    # type: (Tuple[str], Dict[str, Dict[str, str]], Dict[str, Set[str]], str, Optional[Iterable[str]], Optional[int], bool) -> Tuple[int, int]
+    """Write the Sankey JSON of each taxon, skipping those which are unchanged.
+
+    Parameters
+    ----------
+    versions : Tuple[str]
+        The versions, oldest to newest.
+    uid_states : Dict[str, Dict[str, str]]
+        The Dict[version, state] of each uid.
+    taxon_uids : Dict[str, Set[str]]
+        The uids of each taxon.
+    out_dir : str
+        The directory to write to, this also contains the manifest.
+    taxa : Optional[Iterable[str]]
+        The taxa to export, None for all.
+    processes : Optional[int]
+        The number of processes to use, None for the number of CPUs.
+    force : bool
+        True if unchanged taxa should be written again.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The number of taxa written and skipped.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = dict() if force else read_manifest(out_dir)
+
+    jobs, hashes = list(), dict()
+    for taxon in sorted(set(taxon_uids if taxa is None else taxa)):
+        uids = sorted(taxon_uids[taxon])
+        path = os.path.join(out_dir, taxon_file_name(taxon))
+        hashes[taxon] = taxon_hash(versions, uid_states, uids)
+        if manifest.get(taxon) == hashes[taxon] and os.path.isfile(path):
+            continue
+        jobs.append((taxon, uids, path))
+
+    if jobs:
+        _run_jobs(jobs, hashes, versions, uid_states, out_dir, processes)
+
+    # Compact the manifest, which is appended to as each taxon is written.
+    manifest = read_manifest(out_dir)
+    write_atomic(os.path.join(out_dir, MANIFEST),
+                 ''.join(_manifest_line(h, t) for t, h in sorted(manifest.items())))
+    return len(jobs), len(hashes) - len(jobs)
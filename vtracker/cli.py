@@ -0,0 +1,89 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import argparse
+import sys
+import time
+
+from typing import List, Optional
+
+from . import __description__, __version__
+
+
+def _positive_int(value):
+    # type: (str) -> int
+    """An argparse type for integers which are at least one."""
+    try:
+        out = int(value)
+    except ValueError:
+        out = 0
+    if out < 1:
+        raise argparse.ArgumentTypeError('%r is not a positive integer' % value)
+    return out
+
+
+def main(argv=None):
+    # type: (Optional[List[str]]) -> int
+    """The entry point for the vtracker command."""
+    parser = argparse.ArgumentParser(prog='vtracker', description=__description__)
+    parser.add_argument('--version', action='version', version='%(prog)s ' + __version__)
+    subparsers = parser.add_subparsers(dest='command')
+
+    export = subparsers.add_parser('export', help='Write the Sankey JSON of each taxon.')
+    export.add_argument('--release', nargs=2, action='append', required=True, metavar=('VERSION', 'PATH'),
+                        help='A version and a TSV of uid and state, specified from oldest to newest.')
+    export.add_argument('--out-dir', required=True, help='The directory to write the JSON files to.')
+    export.add_argument('--taxa', help='A file of taxa to export (one per line), defaults to all.')
+    export.add_argument('--processes', type=_positive_int, default=None, help='Defaults to the number of CPUs.')
+    export.add_argument('--force', action='store_true', help='Write taxa even if they are unchanged.')
+
+    args = parser.parse_args(argv)
+    if args.command != 'export':
+        parser.print_help()
+        return 1
+
+    # The export machinery is only imported when it is needed.
+    from .batch import build_index, export_taxa, read_release
+
+    start = time.time()
+    releases = list()
+    for version, path in args.release:
+        try:
+            releases.append((version, read_release(path)))
+        except OSError as e:
+            parser.error('Unable to read release %s: %s' % (path, e.strerror))
+        except ValueError as e:
+            parser.error(str(e))
+    versions, uid_states, taxon_uids = build_index(releases)
+    taxa = None
+    if args.taxa:
+        try:
+            with open(args.taxa) as fh:
+                taxa = [line.rstrip('\r\n') for line in fh if line.strip()]
+        except OSError as e:
+            parser.error('Unable to read taxa %s: %s' % (args.taxa, e.strerror))
+        missing = [t for t in taxa if t not in taxon_uids]
+        if missing:
+            parser.error('Taxa not present in any release: %s' % ', '.join(missing))
+
+    n_written, n_skipped = export_taxa(versions, uid_states, taxon_uids, args.out_dir,
+                                       taxa, args.processes, args.force)
+    elapsed = time.time() - start
+    sys.stderr.write('Wrote %d taxa (%d unchanged) in %.2f seconds (%.1f taxa/second).\n' %
+                     (n_written, n_skipped, elapsed, n_written / elapsed if elapsed else 0.0))
+    return 0
+
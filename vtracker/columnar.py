@@ -0,0 +1,114 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+from typing import Dict, List
+
+
+def _import_numpy():
+    """Import NumPy, which is only required for the binary format."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('NumPy is required to read or write .npz files: pip install numpy')
+    return numpy
+
+
+def save_npz(columns, path, compressed=False):
+    # type: (dict, str, bool) -> None
+    """Write the output of VTracker.as_sankey_columns to a NumPy .npz file.
+
+    Parameters
+    ----------
+    columns : dict
+        The output of VTracker.as_sankey_columns.
+    path : str
+        The path to write the file to.
+    compressed : bool
+        True if the arrays should be compressed.
+    """
+    np = _import_numpy()
+    arrays = dict()
+    for key, values in columns.items():
+        if key in ('versions', 'node_name'):
+            arrays[key] = np.array(values, dtype=str)
+        else:
+            arrays[key] = np.asarray(values, dtype=np.int64)
+    if compressed:
+        np.savez_compressed(path, **arrays)
+    else:
+        np.savez(path, **arrays)
+
+
+def load_npz(path):
+    # type: (str) -> dict
+    """Load columns written by save_npz, no per-record objects are created.
+
+    Parameters
+    ----------
+    path : str
+        The path to the .npz file.
+
+    Returns
+    -------
+    dict
+        A dictionary of NumPy arrays keyed as in VTracker.as_sankey_columns.
+    """
+    np = _import_numpy()
+    with np.load(path, allow_pickle=False) as npz:
+        return {k: npz[k] for k in npz.files}
+
+
+def columns_to_sankey_json(columns):
+    # type: (dict) -> Dict[str, List[dict]]
+    """Convert columns back to the format of VTracker.as_sankey_json.
+
+    Highlight ids are in ascending order.
+
+    Parameters
+    ----------
+    columns : dict
+        The output of VTracker.as_sankey_columns, or load_npz.
+
+    Returns
+    -------
+    Dict[str, List[dict]]
+        A dictionary formatted for D3.
+    """
+
+    def csr(prefix, i):
+        offsets, indices = columns[prefix + '_offsets'], columns[prefix + '_indices']
+        return [int(x) for x in indices[offsets[i]:offsets[i + 1]]]
+
+    out = {'links': list(),
+           'nodes': list()}
+
+    for i in range(len(columns['node_total'])):
+        out['nodes'].append({'col': str(columns['versions'][columns['node_col'][i]]),
+                             'id': i,
+                             'linkHighlightId': csr('node_link_highlight', i),
+                             'name': str(columns['node_name'][i]),
+                             'nodeHighlightId': csr('node_node_highlight', i),
+                             'total': int(columns['node_total'][i])})
+
+    for i in range(len(columns['link_value'])):
+        out['links'].append({'id': i,
+                             'linkHighlightId': csr('link_link_highlight', i),
+                             'nodeHighlightId': csr('link_node_highlight', i),
+                             'source': int(columns['link_source'][i]),
+                             'target': int(columns['link_target'][i]),
+                             'value': int(columns['link_value'][i])})
+    return out
@@ -0,0 +1,210 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+from typing import TYPE_CHECKING, Dict, Hashable, List, Set, Tuple
+
+if TYPE_CHECKING:
+    from .vtracker import VTracker
+
+HASH_MASK = (1 << 64) - 1
+
+
+def _mix(h):
+    # type: (int) -> int
+    """Scramble a hash to 64 bits (splitmix64), so sums of similar hashes don't collide."""
+    h &= HASH_MASK
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & HASH_MASK
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & HASH_MASK
+    return h ^ (h >> 31)
+
+
+def uid_hash(uid):
+    # type: (Hashable) -> int
+    """A 64-bit hash of a uid, comparable between trackers in the same process.
+
+    The hash of a set of uids is the sum of the hash of each uid (modulo
+    2^64), allowing it to be updated as each uid is added.
+    """
+    return _mix(hash(uid))
+
+
+def node_hash(uid_sum, key):
+    # type: (int, Tuple[str, str]) -> int
+    """Combine the hash of the uids in a node with its key.
+
+    Nodes which swap uids have different hashes, even though the hash of
+    each set of uids is unchanged.
+    """
+    return _mix(uid_sum ^ _mix(hash(key)))
+
+
+class DiffIndex(object):
+    """The hashes of the present (not Not Present) nodes of a tracker.
+
+    Each version has a hash of its nodes, and an index from the hash of each
+    node to its key, so only the nodes which differ between two trackers
+    are visited. The index is built on the first diff and then kept up to
+    date as uids are added.
+    """
+
+    def __init__(self, vt):
+        # type: (VTracker) -> None
+        """Hash every present node of a tracker.
+
+        Parameters
+        ----------
+        vt : VTracker
+            The tracker to index.
+        """
+        self._na_keys = vt._na_keys  # type: Tuple[Tuple[str, str]]
+        self.ver_hash = [0] * len(self._na_keys)  # type: List[int]
+        self.node_keys = [dict() for _ in self._na_keys]  # type: List[Dict[int, Tuple[str, str]]]
+        self._uid_sums = dict()  # type: Dict[Tuple[str, str], int]
+
+        # Uids which are Not Present at every version aren't in any hash.
+        self.absent_uids = set()  # type: Set[Hashable]
+
+        for idx, keys in enumerate(vt._ver_nodes):
+            for key in keys:
+                if key != self._na_keys[idx]:
+                    uid_sum = sum(uid_hash(uid) for uid in vt._graph.get_node(key).attrs['uid'])
+                    self._set(idx, key, uid_sum & HASH_MASK)
+        na_keys = set(self._na_keys)
+        for uid, keys in vt._uid_to_node.items():
+            if na_keys.issuperset(keys):
+                self.absent_uids.add(uid)
+
+    def _set(self, idx, key, uid_sum):
+        # type: (int, Tuple[str, str], int) -> None
+        """Record the hash of the uids in a node."""
+        h = node_hash(uid_sum, key)
+        self._uid_sums[key] = uid_sum
+        self.node_keys[idx][h] = key
+        self.ver_hash[idx] = (self.ver_hash[idx] + h) & HASH_MASK
+
+    def add(self, uid, keys):
+        # type: (Hashable, List[Tuple[str, str]]) -> None
+        """Update the hashes after a uid was added to the node of each key."""
+        h = uid_hash(uid)
+        present = False
+        for idx, key in enumerate(keys):
+            if key == self._na_keys[idx]:
+                continue
+            present = True
+            uid_sum = self._uid_sums.get(key)
+            if uid_sum is None:
+                uid_sum = 0
+            else:
+                old = node_hash(uid_sum, key)
+                del self.node_keys[idx][old]
+                self.ver_hash[idx] = (self.ver_hash[idx] - old) & HASH_MASK
+            self._set(idx, key, (uid_sum + h) & HASH_MASK)
+        if not present:
+            self.absent_uids.add(uid)
+
+
+class TrackerDiff(object):
+    """The differences between two trackers."""
+
+    def __init__(self, nodes, edges, uids):
+        # type: (Set[Tuple[str, str]], Set[Tuple[Tuple[str, str], Tuple[str, str]]], Set[str]) -> None
+        """Instantiate the diff.
+
+        Parameters
+        ----------
+        nodes : Set[Tuple[str, str]]
+            The keys of nodes which are only in one tracker, or have different uids.
+        edges : Set[Tuple[Tuple[str, str], Tuple[str, str]]]
+            The keys of edges which are only in one tracker, or have different uids.
+        uids : Set[str]
+            The uids which are only in one tracker, or have a different state at any version.
+        """
+        self.nodes = nodes
+        self.edges = edges
+        self.uids = uids
+
+    def __bool__(self):
+        return bool(self.nodes or self.edges or self.uids)
+
+    def __repr__(self):
+        return 'TrackerDiff(nodes=%d, edges=%d, uids=%d)' % (len(self.nodes), len(self.edges), len(self.uids))
+
+
+def _node_uids(vt, key):
+    # type: (VTracker, Tuple[str, str]) -> Set[Hashable]
+    """The uids of a node, or an empty set if it isn't in the tracker."""
+    node = vt._graph.get_node(key)
+    return node.attrs['uid'] if node else frozenset()
+
+
+def _uid_path(vt, uid):
+    # type: (VTracker, Hashable) -> Tuple[Tuple[Tuple[str, str], ...], Tuple[Tuple[Tuple[str, str], Tuple[str, str]], ...]]
+    """The node and edge keys of a uid, or empty if it isn't in the tracker."""
+    if uid not in vt._uid_to_node:
+        return (), ()
+    return vt._uid_to_node[uid], vt._get_uid_edges(uid)
+
+
+def diff_trackers(vt, other):
+    # type: (VTracker, VTracker) -> TrackerDiff
+    """Compare the nodes, edges and uids of two trackers.
+
+    The uids which changed are found first. Only versions whose hash differs
+    are compared, and within those only the present nodes whose hash is not
+    in the other tracker. A uid which changed is in one of those nodes, but
+    not the same node of the other tracker (or is absent at every version
+    in one tracker). The nodes and edges which differ are exactly those on
+    the path of a changed uid in one tracker but not the other.
+
+    The cost is the number of versions, plus a hash lookup for each present
+    node in the versions which changed, plus the uids of the nodes which
+    changed, plus the versions of each changed uid. Trackers with different
+    versions compare every uid.
+
+    Parameters
+    ----------
+    vt : VTracker
+        The original tracker.
+    other : VTracker
+        The tracker to compare against.
+
+    Returns
+    -------
+    TrackerDiff
+        The nodes, edges, and uids which differ.
+    """
+    if vt._idx_to_ver == other._idx_to_ver:
+        index, other_index = vt._get_diff_index(), other._get_diff_index()
+        uids = index.absent_uids ^ other_index.absent_uids
+        for idx, (ver_hash, other_ver_hash) in enumerate(zip(index.ver_hash, other_index.ver_hash)):
+            if ver_hash == other_ver_hash:
+                continue
+            node_keys, other_node_keys = index.node_keys[idx], other_index.node_keys[idx]
+            keys = {node_keys.get(h) or other_node_keys[h] for h in node_keys.keys() ^ other_node_keys.keys()}
+            for key in keys:
+                uids.update(_node_uids(vt, key) ^ _node_uids(other, key))
+    else:
+        uids = {uid for uid in set(vt._uid_to_node).union(other._uid_to_node)
+                if vt._uid_to_node.get(uid) != other._uid_to_node.get(uid)}
+
+    nodes, edges = set(), set()
+    for uid in uids:
+        node_keys, edge_keys = _uid_path(vt, uid)
+        other_node_keys, other_edge_keys = _uid_path(other, uid)
+        nodes.update(set(node_keys).symmetric_difference(other_node_keys))
+        edges.update(set(edge_keys).symmetric_difference(other_edge_keys))
+    return TrackerDiff(nodes, edges, uids)
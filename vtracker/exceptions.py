@@ -56,3 +56,24 @@ class DuplicateEdge(GraphException):
 
     def __init__(self, message=''):
         GraphException.__init__(self, message)
+
+
+class ImmutableTracker(VTrackerException):
+    """Thrown when attempting to modify a frozen tracker."""
+
+    def __init__(self, message=''):
+        VTrackerException.__init__(self, message)
+
+
+class ConflictingState(VTrackerException):
+    """Thrown when an entity is given two different states at one version."""
+
+    def __init__(self, message=''):
+        VTrackerException.__init__(self, message)
+
+
+class MissingState(VTrackerException):
+    """Thrown when a state is specified which doesn't exist at a version."""
+
+    def __init__(self, message=''):
+        VTrackerException.__init__(self, message)
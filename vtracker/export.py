@@ -0,0 +1,170 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import json
+import tempfile
+from operator import itemgetter
+
+from typing import TYPE_CHECKING, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from .runs import merge_runs, spill
+
+if TYPE_CHECKING:
+    from .vtracker import VTracker
+
+_by_id = itemgetter(0)
+
+
+def _build_path_travel(vt):
+    # type: (VTracker) -> Dict[str, Tuple[Set[int], Set[int]]]
+    """Create the node and edge ids travelled by each uid.
+
+    Uids which travel the same path share the same sets, built exactly as in
+    VTracker._build_uid_paths so that set iteration order is identical.
+
+    Returns
+    -------
+    Dict[str, Tuple[Set[int], Set[int]]]
+        The (node ids, edge ids) travelled by each uid.
+    """
+    graph = vt._graph
+    paths = dict()  # type: Dict[Tuple[int], Tuple[Set[int], Set[int]]]
+    out = dict()  # type: Dict[str, Tuple[Set[int], Set[int]]]
+    for i, uid in enumerate(vt._uid_to_node):
+        path = tuple(node_ids[i] for node_ids in vt._ver_node_ids)
+        travel = paths.get(path)
+        if travel is None:
+            edges = set()
+            for edge_from, edge_to in vt._get_uid_edges(uid):
+                edges.add(graph.get_edge(edge_from, edge_to)._edge_id)
+            nodes = set()
+            for node_key in vt._uid_to_node[uid]:
+                nodes.add(graph.get_node(node_key)._node_id)
+            travel = paths[path] = (nodes, edges)
+        out[uid] = travel
+    return out
+
+
+def _highlight(uids, travel):
+    # type: (Set[str], Dict[str, Tuple[Set[int], Set[int]]]) -> Tuple[Set[int], Set[int]]
+    """Union the travelled ids of each uid, in the same order as VTracker._highlight_ids."""
+    link_highlight_id = set()
+    node_highlight_id = set()
+    for uid in uids:
+        nodes, edges = travel[uid]
+        node_highlight_id = node_highlight_id.union(nodes)
+        link_highlight_id = link_highlight_id.union(edges)
+    return node_highlight_id, link_highlight_id
+
+
+class _Runs(object):
+    """Serialised records buffered in memory, spilled to disk as sorted runs."""
+
+    def __init__(self, tmp_dir, max_ids):
+        # type: (str, int) -> None
+        self._tmp_dir = tmp_dir
+        self._max_ids = max_ids
+        self._buffer = list()  # type: List[Tuple[int, str]]
+        self._n_ids = 0
+        self._paths = list()  # type: List[str]
+
+    def add(self, record_id, record, n_ids):
+        # type: (int, dict, int) -> None
+        """Buffer a record, spilling the buffer once it holds too many ids."""
+        self._buffer.append((record_id, json.dumps(record)))
+        self._n_ids += n_ids
+        if self._n_ids >= self._max_ids:
+            self._paths.append(spill(self._buffer, _by_id, self._tmp_dir))
+            self._buffer, self._n_ids = list(), 0
+
+    def merge(self):
+        # type: () -> Iterator[str]
+        """Yield each serialised record in order of id."""
+        for _, data in merge_runs(self._paths, self._buffer, _by_id, self._tmp_dir):
+            yield data
+
+
+def write_sankey_json(vt, fh, max_ids=10000000, tmp_dir=None):
+    # type: (VTracker, IO[str], int, Optional[str]) -> None
+    """Write the D3 Sankey JSON to a file using a bounded amount of memory.
+
+    The output is identical to json.dump(vt.as_sankey_json(), fh). Uids which
+    travel the same path share their highlight sets, nodes and links are
+    processed one version (column) at a time, and serialised records are
+    spilled to disk once they contain more than max_ids highlight ids. The
+    number of runs open at once is bounded, larger numbers of runs are merged
+    over several passes.
+
+    The max_ids budget only covers the buffered records. The node and edge
+    ids travelled by each distinct path, and the highlight sets of the record
+    being serialised, are held in memory in addition to it.
+
+    Parameters
+    ----------
+    vt : VTracker
+        The tracker to export.
+    fh : IO[str]
+        The file to write to.
+    max_ids : int
+        The number of highlight ids to hold in memory before spilling.
+    tmp_dir : Optional[str]
+        The directory to spill to, None for the system default.
+    """
+    if max_ids < 1:
+        raise ValueError('The maximum number of ids must be a positive integer.')
+    travel = _build_path_travel(vt)
+
+    # Group the nodes and edges by the column (version) they start in.
+    ver_to_idx = vt._ver_to_idx
+    node_cols = [list() for _ in ver_to_idx]
+    edge_cols = [list() for _ in ver_to_idx]
+    for node in vt._graph.iter_nodes():
+        node_cols[ver_to_idx[node._key[0]]].append(node)
+    for edge in vt._graph.iter_edges():
+        edge_cols[ver_to_idx[edge._from_node._key[0]]].append(edge)
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as run_dir:
+        node_runs, link_runs = _Runs(run_dir, max_ids), _Runs(run_dir, max_ids)
+        for nodes, edges in zip(node_cols, edge_cols):
+            for node in nodes:
+                ver, state = node._key
+                node_highlight_id, link_highlight_id = _highlight(node.attrs['uid'], travel)
+                node_runs.add(node._node_id, {'col': ver,
+                                              'id': node._node_id,
+                                              'linkHighlightId': list(link_highlight_id),
+                                              'name': state,
+                                              'nodeHighlightId': list(node_highlight_id),
+                                              'total': len(node.attrs['uid'])},
+                              len(node_highlight_id) + len(link_highlight_id))
+            for edge in edges:
+                node_highlight_id, link_highlight_id = _highlight(edge.attrs['uid'], travel)
+                link_runs.add(edge._edge_id, {'id': edge._edge_id,
+                                              'linkHighlightId': list(link_highlight_id),
+                                              'nodeHighlightId': list(node_highlight_id),
+                                              'source': edge._from_node._node_id,
+                                              'target': edge._to_node._node_id,
+                                              'value': len(edge.attrs['uid'])},
+                              len(node_highlight_id) + len(link_highlight_id))
+
+        # Write in the same format as json.dump.
+        for section, runs in (('links', link_runs), ('nodes', node_runs)):
+            fh.write('{"links": [' if section == 'links' else '], "nodes": [')
+            for i, data in enumerate(runs.merge()):
+                if i:
+                    fh.write(', ')
+                fh.write(data)
+        fh.write(']}')
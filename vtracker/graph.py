@@ -15,7 +15,7 @@
 #                                                                             #
 ###############################################################################
 
-from typing import Optional, Dict, Tuple, Generator, Set
+from typing import Optional, Dict, Tuple, Generator, Set, List
 
 from .exceptions import DuplicateNode, DuplicateEdge
 
@@ -26,6 +26,7 @@ class Graph(object):
     def __init__(self):
         """Instantiate a blank graph."""
         self._nodes = dict()  # type: Dict[str, Node]
+        self._node_keys = list()  # type: List[str]
         self._edges = dict()  # type: Dict[Tuple[str, str], Edge]
         self._node_id = 0  # type: int
         self._edge_id = 0  # type: int
@@ -48,6 +49,7 @@ class Graph(object):
         """
         if key not in self._nodes:
             self._nodes[key] = Node(self._node_id, key, attrs)
+            self._node_keys.append(key)
             self._node_id += 1
         elif attrs != self._nodes[key].attrs:
             raise DuplicateNode('Duplicate node with inconsistent attributes.')
@@ -68,6 +70,22 @@ class Graph(object):
         """
         return self._nodes.get(key)
 
+    def get_node_key(self, node_id):
+        # type: (int) -> str
+        """Retrieve the key of a node from its id.
+
+        Parameters
+        ----------
+        node_id: int
+            The unique ID of the node in the graph.
+
+        Returns
+        -------
+        str
+            The key of the node.
+        """
+        return self._node_keys[node_id]
+
     def add_edge(self, from_key, to_key, attrs=None):
         # type: (str, str, Optional[dict]) -> None
         """Create a directed edge between two nodes.
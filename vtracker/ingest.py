@@ -0,0 +1,78 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .exceptions import ConflictingState
+from .runs import merge_runs, spill
+
+_by_uid = itemgetter(0)
+
+
+def iter_grouped_rows(rows, max_rows=1000000, tmp_dir=None):
+    # type: (Iterable[Tuple[str, str, str]], int, Optional[str]) -> Iterator[Tuple[str, Dict[str, str]]]
+    """Group long-format (uid, version, state) rows by uid.
+
+    At most max_rows rows are held in memory, beyond that sorted runs are
+    spilled to temporary files which are merged once the input is exhausted.
+    The number of runs open at once is bounded, larger numbers of runs are
+    merged over several passes.
+
+    Parameters
+    ----------
+    rows : Iterable[Tuple[str, str, str]]
+        The (uid, version, state) rows, in any order.
+    max_rows : int
+        The maximum number of rows to hold in memory.
+    tmp_dir : Optional[str]
+        The directory to spill runs to, None for the system default.
+
+    Returns
+    -------
+    Iterator[Tuple[str, Dict[str, str]]]
+        Yields (uid, ver_states) in ascending order of uid.
+
+    Raises
+    ------
+    ConflictingState
+        When a uid is given two different states at the same version.
+    """
+    if max_rows < 1:
+        raise ValueError('The maximum number of rows must be a positive integer.')
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as run_dir:
+        runs = list()  # type: List[str]
+        buffer = list()  # type: List[Tuple[str, str, str]]
+        for uid, ver, state in rows:
+            buffer.append((uid, ver, state))
+            if len(buffer) >= max_rows:
+                runs.append(spill(buffer, _by_uid, run_dir))
+                buffer = list()
+
+        # Merge the spilled runs with whatever remains in memory.
+        merged = merge_runs(runs, buffer, _by_uid, run_dir)
+
+        for uid, uid_rows in groupby(merged, key=_by_uid):
+            ver_states = dict()  # type: Dict[str, str]
+            for _, ver, state in uid_rows:
+                if ver_states.setdefault(ver, state) != state:
+                    raise ConflictingState('Multiple states for %s at version %s.' % (uid, ver))
+            yield uid, ver_states
@@ -0,0 +1,146 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+
+def _iter_bits(bits):
+    # type: (int) -> Iterable[int]
+    """Yield the index of each set bit in ascending order."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _union(bases, bits, other_bases, other_bits, offset):
+    # type: (List[int], List[int], List[int], List[int], int) -> None
+    """Union the other per-layer bitsets into bases and bits, starting at layer offset."""
+    for i, (other_base, other) in enumerate(zip(other_bases, other_bits), offset):
+        cur = bits[i]
+        if not cur:
+            bases[i], bits[i] = other_base, other
+        elif other_base < bases[i]:
+            bits[i] = (cur << (bases[i] - other_base)) | other
+            bases[i] = other_base
+        else:
+            bits[i] = cur | (other << (other_base - bases[i]))
+
+
+class Reachability(object):
+    """Precomputed ancestors and descendants of every node in a layered DAG.
+
+    Nodes are grouped into layers (e.g. versions) with edges only going from
+    an earlier layer to a later one. The nodes reachable from each node are
+    stored as one bitset per layer, only for the layers before it (ancestors)
+    or after it (descendants). Bit i of a layer's bitset is the node at
+    position base + i of that layer, so each bitset only spans the positions
+    which are reachable rather than the whole graph. The bitsets are built in
+    a single pass over the layers.
+    """
+
+    def __init__(self, layers, edges):
+        # type: (Sequence[Sequence[int]], Iterable[Tuple[int, int]]) -> None
+        """Compute the reachability of each node.
+
+        Parameters
+        ----------
+        layers : Sequence[Sequence[int]]
+            The node ids in each layer, each id must appear at most once. Ids
+            which are not in any layer have no ancestors or descendants.
+        edges : Iterable[Tuple[int, int]]
+            The (from, to) node ids of each directed edge, from an earlier
+            layer to a later one. Both nodes must be in a layer.
+        """
+        n_nodes = 1 + max((max(layer) for layer in layers if layer), default=-1)
+        n_layers = len(layers)
+        self._layers = [list(layer) for layer in layers]  # type: List[List[int]]
+        self._layer = [None] * n_nodes  # type: List[Optional[int]]
+        self._pos = [0] * n_nodes  # type: List[int]
+        for layer_idx, layer in enumerate(self._layers):
+            for pos, node_id in enumerate(layer):
+                self._layer[node_id] = layer_idx
+                self._pos[node_id] = pos
+
+        edges_out = [list() for _ in range(n_nodes)]  # type: List[List[int]]
+        edges_in = [list() for _ in range(n_nodes)]  # type: List[List[int]]
+        for from_id, to_id in edges:
+            edges_out[from_id].append(to_id)
+            edges_in[to_id].append(from_id)
+
+        # The (bases, bits) of the layers before each node, each node can reach
+        # its parents and everything its parents can reach.
+        self._ancestors = [None] * n_nodes  # type: List[Tuple[List[int], List[int]]]
+        for layer_idx, layer in enumerate(self._layers):
+            for node_id in layer:
+                bases, bits = [0] * layer_idx, [0] * layer_idx
+                for parent in edges_in[node_id]:
+                    _union(bases, bits, *self._ancestors[parent], 0)
+                    _union(bases, bits, (self._pos[parent],), (1,), self._layer[parent])
+                self._ancestors[node_id] = (bases, bits)
+
+        # Likewise for the layers after each node, index i is layer i + 1 after it.
+        self._descendants = [None] * n_nodes  # type: List[Tuple[List[int], List[int]]]
+        for layer_idx in reversed(range(n_layers)):
+            for node_id in self._layers[layer_idx]:
+                n_after = n_layers - layer_idx - 1
+                bases, bits = [0] * n_after, [0] * n_after
+                for child in edges_out[node_id]:
+                    offset = self._layer[child] - layer_idx
+                    _union(bases, bits, *self._descendants[child], offset)
+                    _union(bases, bits, (self._pos[child],), (1,), offset - 1)
+                self._descendants[node_id] = (bases, bits)
+
+    def _decode(self, bases, bits, first_layer):
+        # type: (List[int], List[int], int) -> List[int]
+        """Convert per-layer bitsets (starting at first_layer) to sorted node ids."""
+        out = list()  # type: List[int]
+        for layer, base, layer_bits in zip(self._layers[first_layer:], bases, bits):
+            out.extend(layer[base + i] for i in _iter_bits(layer_bits))
+        out.sort()
+        return out
+
+    def _in_layer(self, node_id):
+        # type: (int) -> bool
+        """True if the node is in any layer."""
+        return node_id < len(self._layer) and self._layer[node_id] is not None
+
+    def ancestors(self, node_id):
+        # type: (int) -> List[int]
+        """Return the ids of all nodes upstream of a node, in ascending order."""
+        if not self._in_layer(node_id):
+            return list()
+        return self._decode(*self._ancestors[node_id], 0)
+
+    def descendants(self, node_id):
+        # type: (int) -> List[int]
+        """Return the ids of all nodes downstream of a node, in ascending order."""
+        if not self._in_layer(node_id):
+            return list()
+        return self._decode(*self._descendants[node_id], self._layer[node_id] + 1)
+
+    def is_ancestor(self, ancestor_id, node_id):
+        # type: (int, int) -> bool
+        """True if there is a path from ancestor_id to node_id."""
+        if not (self._in_layer(ancestor_id) and self._in_layer(node_id)):
+            return False
+        offset = self._layer[node_id] - self._layer[ancestor_id]
+        if offset < 1:
+            return False
+        bases, bits = self._descendants[ancestor_id]
+        shift = self._pos[node_id] - bases[offset - 1]
+        return shift >= 0 and bool((bits[offset - 1] >> shift) & 1)
@@ -0,0 +1,113 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import heapq
+import json
+import os
+import tempfile
+
+from typing import Callable, Iterable, Iterator, List
+
+# The maximum number of runs merged at once, this bounds the open files.
+_MERGE_FAN_IN = 64
+
+
+def write_run(rows, tmp_dir):
+    # type: (Iterable[tuple], str) -> str
+    """Write rows (already sorted) to a temporary file, one JSON list per line.
+
+    Parameters
+    ----------
+    rows : Iterable[tuple]
+        The rows to write, each must be JSON serialisable.
+    tmp_dir : str
+        The directory to write the run to.
+
+    Returns
+    -------
+    str
+        The path to the run.
+    """
+    fd, path = tempfile.mkstemp(suffix='.jsonl', dir=tmp_dir)
+    with os.fdopen(fd, 'w') as fh:
+        for row in rows:
+            fh.write(json.dumps(row))
+            fh.write('\n')
+    return path
+
+
+def read_run(path):
+    # type: (str) -> Iterator[tuple]
+    """Read the rows of a run written by write_run."""
+    with open(path) as fh:
+        for line in fh:
+            yield tuple(json.loads(line))
+
+
+def spill(rows, key, tmp_dir):
+    # type: (List[tuple], Callable, str) -> str
+    """Sort rows in place and write them to a temporary file.
+
+    Returns
+    -------
+    str
+        The path to the run.
+    """
+    rows.sort(key=key)
+    return write_run(rows, tmp_dir)
+
+
+def merge_runs(paths, rows, key, tmp_dir):
+    # type: (List[str], List[tuple], Callable, str) -> Iterator[tuple]
+    """Merge sorted runs, and rows held in memory, in order of key.
+
+    At most _MERGE_FAN_IN runs are open at once. Larger numbers of runs are
+    first merged in passes, until the remaining runs and the in-memory rows
+    can be merged at once. Runs are merged in order, so rows with equal keys
+    keep the order they were spilled in, followed by the in-memory rows.
+    Intermediate runs are removed once they have been merged.
+
+    Parameters
+    ----------
+    paths : List[str]
+        The paths to each run, each sorted by key.
+    rows : List[tuple]
+        The rows held in memory, these are sorted in place.
+    key : Callable
+        The key which the runs are sorted by.
+    tmp_dir : str
+        The directory to write intermediate runs to.
+
+    Returns
+    -------
+    Iterator[tuple]
+        Yields every row in order of key.
+    """
+    while len(paths) >= _MERGE_FAN_IN:
+        merged = list()  # type: List[str]
+        for i in range(0, len(paths), _MERGE_FAN_IN):
+            group = paths[i:i + _MERGE_FAN_IN]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            merged.append(write_run(heapq.merge(*[read_run(path) for path in group], key=key), tmp_dir))
+            for path in group:
+                os.remove(path)
+        paths = merged
+
+    rows.sort(key=key)
+    return heapq.merge(*[read_run(path) for path in paths], rows, key=key)
@@ -0,0 +1,283 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+import threading
+from array import array
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .exceptions import ImmutableTracker
+from .graph import Edge, Graph, Node
+from .vtracker import VTracker
+
+
+def _freeze(value):
+    """Return an immutable copy of part of the state of a tracker."""
+    if isinstance(value, Graph):
+        # Nodes and edges are re-created in order to keep their ids.
+        graph = Graph()
+        for node in value.iter_nodes():
+            graph.add_node(node._key, attrs=_freeze(node.attrs))
+        for edge in value.iter_edges():
+            graph.add_edge(edge._from_node._key, edge._to_node._key, attrs=_freeze(edge.attrs))
+        return graph
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return {k: _freeze(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, array):
+        return array(value.typecode, value)
+    return value
+
+
+def _freeze_node(node):
+    # type: (Node) -> Node
+    """Return an immutable copy of a node."""
+    frozen = Node(node._node_id, node._key, _freeze(node.attrs))
+    frozen._edges_out = set(node._edges_out)
+    frozen._edges_in = set(node._edges_in)
+    return frozen
+
+
+def _update_graph(previous, graph, node_keys, edge_keys):
+    # type: (Graph, Graph, Set[Tuple[str, str]], Set[Tuple[Tuple[str, str], Tuple[str, str]]]) -> Graph
+    """Copy a graph, sharing the nodes and edges of its previous copy which haven't changed.
+
+    Parameters
+    ----------
+    previous : Graph
+        The previous frozen copy of the graph.
+    graph : Graph
+        The graph to copy, nodes and edges are only ever added to it.
+    node_keys : Set[Tuple[str, str]]
+        The keys of the nodes which were added or changed since the previous copy.
+    edge_keys : Set[Tuple[Tuple[str, str], Tuple[str, str]]]
+        Likewise for edges.
+
+    Returns
+    -------
+    Graph
+        The new frozen copy of the graph.
+    """
+    out = Graph()
+    out._nodes = dict(previous._nodes)
+    out._node_keys = list(graph._node_keys)
+    out._edges = dict(previous._edges)
+    out._node_id, out._edge_id = graph._node_id, graph._edge_id
+
+    # Edges of a changed node are re-created to reference the new copy of it,
+    # unchanged edges share their attributes with the previous copy.
+    linked_keys = set()
+    for key in node_keys:
+        node = graph._nodes[key]
+        out._nodes[key] = _freeze_node(node)
+        linked_keys.update(node._edges_in)
+        linked_keys.update(node._edges_out)
+    for key in linked_keys:
+        edge = graph._edges[key]
+        attrs = _freeze(edge.attrs) if key in edge_keys else previous._edges[key].attrs
+        out._edges[key] = Edge(edge._edge_id, out._nodes[key[0]], out._nodes[key[1]], attrs)
+    return out
+
+
+class FrozenVTracker(VTracker):
+    """An immutable snapshot of a VTracker.
+
+    Nothing is modified after construction, so any number of threads can
+    query a snapshot concurrently without locking.
+    """
+
+    def __init__(self, vt):
+        # type: (VTracker) -> None
+        """Create a snapshot of the current state of a tracker.
+
+        Parameters
+        ----------
+        vt : VTracker
+            The tracker to copy, this must not be modified during the copy.
+        """
+        self.str_na = vt.str_na
+        VTracker.__init__(self, vt._idx_to_ver)
+
+        # Copy everything maintained by add, the caches are left as initialised.
+        for name in vars(self):
+            if name not in self._caches:
+                setattr(self, name, _freeze(getattr(vt, name)))
+
+        self._uid_paths = None  # type: Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]
+
+    @classmethod
+    def _update(cls, previous, vt, uids):
+        # type: (FrozenVTracker, VTracker, Iterable[str]) -> FrozenVTracker
+        """Create a snapshot of a tracker from a previous snapshot of it.
+
+        Only the nodes and edges of the uids added since the previous snapshot
+        are copied, the rest are shared with it. The remaining state is either
+        immutable or copied without visiting each item.
+
+        Parameters
+        ----------
+        previous : FrozenVTracker
+            The previous snapshot of the tracker.
+        vt : VTracker
+            The tracker to copy, this must not be modified during the copy.
+        uids : Iterable[str]
+            The uids added to the tracker since the previous snapshot.
+
+        Returns
+        -------
+        FrozenVTracker
+            The new snapshot.
+        """
+        node_keys, edge_keys = set(), set()
+        for uid in uids:
+            node_keys.update(vt._uid_to_node[uid])
+            edge_keys.update(vt._get_uid_edges(uid))
+
+        self = cls.__new__(cls)
+        self.str_na = vt.str_na
+        VTracker.__init__(self, vt._idx_to_ver)
+        updated = {'_graph': _update_graph(previous._graph, vt._graph, node_keys, edge_keys),
+                   '_uid_to_node': dict(vt._uid_to_node),  # The node keys of each uid are tuples.
+                   '_ver_nodes': tuple(tuple(keys) for keys in vt._ver_nodes)}
+        for name in vars(self):
+            if name not in self._caches:
+                setattr(self, name, updated[name] if name in updated else _freeze(getattr(vt, name)))
+
+        self._uid_paths = None
+        return self
+
+    def add(self, uid, ver_states):
+        # type: (str, Dict[str, str]) -> None
+        """Frozen trackers cannot be modified.
+
+        Raises
+        ------
+        ImmutableTracker
+            Always.
+        """
+        raise ImmutableTracker('Unable to add to a frozen tracker.')
+
+    def freeze(self):
+        # type: () -> FrozenVTracker
+        """A frozen tracker is its own snapshot."""
+        return self
+
+    def _build_uid_paths(self, uids=None):
+        # type: (Optional[Iterable[str]]) -> Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]
+        """Create a set of all nodes and links which each uid is a part of.
+
+        The result for every uid is computed once and shared between all
+        readers, concurrent first calls may compute it more than once but will
+        agree on the value.
+
+        Parameters
+        ----------
+        uids : Optional[Iterable[str]]
+            Only create the sets of these uids, None for every uid. These are
+            not cached, the cached sets of every uid are returned if present.
+
+        Returns
+        -------
+        Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]
+            Returns Dict[uid, Set[node_ids]] for nodes, likewise for edges.
+        """
+        if self._uid_paths is None and uids is not None:
+            return VTracker._build_uid_paths(self, uids)
+        if self._uid_paths is None:
+            nodes, edges = VTracker._build_uid_paths(self)
+            self._uid_paths = ({uid: frozenset(nodes[uid]) for uid in self._uid_to_node},
+                               {uid: frozenset(edges[uid]) for uid in self._uid_to_node})
+        return self._uid_paths
+
+
+class VTrackerPublisher(object):
+    """Publishes frozen snapshots of a tracker which is being ingested into.
+
+    A single writer adds entities to a private tracker, readers only ever see
+    the most recently published snapshot. Each publication increments the
+    epoch, the epoch and snapshot are always swapped together. Snapshots
+    share the nodes and edges which haven't changed since the previous one.
+    """
+
+    def __init__(self, versions):
+        # type: (Iterable[str]) -> None
+        """Instantiate the publisher with an empty snapshot.
+
+        Parameters
+        ----------
+        versions: Iterable[str]
+            A collection of versions in order of oldest to newest.
+        """
+        self._tracker = VTracker(versions)  # type: VTracker
+        self._lock = threading.Lock()
+        self._current = (0, self._tracker.freeze())  # type: Tuple[int, FrozenVTracker]
+
+        # The uids added since the current snapshot was published.
+        self._pending = list()  # type: List[str]
+
+    @property
+    def epoch(self):
+        # type: () -> int
+        """The epoch of the most recently published snapshot."""
+        return self._current[0]
+
+    @property
+    def snapshot(self):
+        # type: () -> FrozenVTracker
+        """The most recently published snapshot."""
+        return self._current[1]
+
+    def current(self):
+        # type: () -> Tuple[int, FrozenVTracker]
+        """Return the epoch and snapshot which were published together."""
+        return self._current
+
+    def add(self, uid, ver_states):
+        # type: (str, Dict[str, str]) -> None
+        """Add an entity to the tracker, this is not visible until published.
+
+        Parameters
+        ----------
+        uid : str
+            The unique identifier of this entity.
+        ver_states: Dict[str, str]
+            The Dict[version, state] of this entity at specified versions.
+        """
+        with self._lock:
+            self._tracker.add(uid, ver_states)
+            self._pending.append(uid)
+
+    def publish(self):
+        # type: () -> Tuple[int, FrozenVTracker]
+        """Freeze the tracker and make it visible to readers.
+
+        Only what changed since the previous snapshot is copied.
+
+        Returns
+        -------
+        Tuple[int, FrozenVTracker]
+            The epoch and snapshot which were published.
+        """
+        with self._lock:
+            epoch, previous = self._current
+            current = (epoch + 1, FrozenVTracker._update(previous, self._tracker, self._pending))
+            self._current = current
+            self._pending = list()
+        return current
@@ -0,0 +1,117 @@
+###############################################################################
+#                                                                             #
+#    This program is free software: you can redistribute it and/or modify     #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This program is distributed in the hope that it will be useful,          #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.     #
+#                                                                             #
+###############################################################################
+
+from collections import Counter
+
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from .graph import Graph
+
+
+class TransitionMatrix(object):
+    """A sparse matrix counting the uids which moved between two versions.
+
+    Rows are the states at the source version, columns are the states at the
+    target version, both in order of node id.
+    """
+
+    def __init__(self, ver_from, ver_to, sources, targets, counts):
+        # type: (str, str, Tuple[str], Tuple[str], Dict[Tuple[int, int], int]) -> None
+        """Instantiate the matrix.
+
+        Parameters
+        ----------
+        ver_from : str
+            The source version.
+        ver_to : str
+            The target version.
+        sources : Tuple[str]
+            The state represented by each row.
+        targets : Tuple[str]
+            The state represented by each column.
+        counts : Dict[Tuple[int, int], int]
+            The number of uids for each non-zero (row, column).
+        """
+        self.ver_from = ver_from  # type: str
+        self.ver_to = ver_to  # type: str
+        self.sources = sources  # type: Tuple[str]
+        self.targets = targets  # type: Tuple[str]
+        self.counts = counts  # type: Dict[Tuple[int, int], int]
+        self._source_idx = {s: i for i, s in enumerate(sources)}  # type: Dict[str, int]
+        self._target_idx = {s: i for i, s in enumerate(targets)}  # type: Dict[str, int]
+
+    @classmethod
+    def from_columns(cls, ver_from, ver_to, col_from, col_to, graph):
+        # type: (str, str, Sequence[int], Sequence[int], Graph) -> TransitionMatrix
+        """Group-by the node ids of each uid at the source and target version.
+
+        Parameters
+        ----------
+        ver_from : str
+            The source version.
+        ver_to : str
+            The target version.
+        col_from : Sequence[int]
+            The node id of each uid at the source version.
+        col_to : Sequence[int]
+            The node id of each uid at the target version, in the same order.
+        graph : Graph
+            The graph which the node ids belong to.
+
+        Returns
+        -------
+        TransitionMatrix
+            The counts of each (source, target) pair.
+        """
+        pairs = Counter(zip(col_from, col_to))
+        source_ids = sorted({i for i, _ in pairs})
+        target_ids = sorted({j for _, j in pairs})
+        row = {node_id: i for i, node_id in enumerate(source_ids)}
+        col = {node_id: j for j, node_id in enumerate(target_ids)}
+        counts = {(row[i], col[j]): n for (i, j), n in pairs.items()}
+        return cls(ver_from, ver_to,
+                   tuple(graph.get_node_key(i)[1] for i in source_ids),
+                   tuple(graph.get_node_key(j)[1] for j in target_ids),
+                   counts)
+
+    @property
+    def shape(self):
+        # type: () -> Tuple[int, int]
+        """The number of rows and columns."""
+        return len(self.sources), len(self.targets)
+
+    def get(self, source, target):
+        # type: (str, str) -> int
+        """Return the number of uids which moved from source to target."""
+        i, j = self._source_idx.get(source), self._target_idx.get(target)
+        if i is None or j is None:
+            return 0
+        return self.counts.get((i, j), 0)
+
+    def items(self):
+        # type: () -> Iterator[Tuple[str, str, int]]
+        """Yield each non-zero (source, target, count) in row-major order."""
+        for (i, j) in sorted(self.counts):
+            yield self.sources[i], self.targets[j], self.counts[(i, j)]
+
+    def to_dense(self):
+        # type: () -> List[List[int]]
+        """Return the matrix as a list of rows."""
+        out = [[0] * len(self.targets) for _ in self.sources]
+        for (i, j), n in self.counts.items():
+            out[i][j] = n
+        return out
@@ -15,17 +15,51 @@
 #                                                                             #
 ###############################################################################
 
+import heapq
+from array import array
 from collections import defaultdict
+from itertools import chain
 
-from typing import Iterable, Dict, Tuple, Set, List
+from typing import TYPE_CHECKING, Iterable, Dict, Tuple, Set, List, Generator, Optional, Union, IO
 
-from .exceptions import MissingVersion, DuplicateEntity
+from .exceptions import MissingVersion, DuplicateEntity, MissingState
 from .graph import Graph
 
+# Queries beyond the core tracker are imported on first use.
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from typing import AsyncIterator, Awaitable
+
+    from .diff import DiffIndex, TrackerDiff
+    from .reachability import Reachability
+    from .snapshot import FrozenVTracker
+    from .transition import TransitionMatrix
+
+# Highlights every node or link when approximating the Sankey JSON.
+HIGHLIGHT_ALL = 'all'
+
+
+def _capped_union(uids, uid_travel_id, limit):
+    # type: (Iterable[str], Dict[str, Set[int]], int) -> Tuple[List[int], bool]
+    """Union the ids of each uid, keeping only the lowest limit ids.
+
+    Returns
+    -------
+    Tuple[List[int], bool]
+        The lowest (at most limit) ids, and True if the union was truncated.
+    """
+    ids = set().union(*(uid_travel_id[uid] for uid in uids))
+    if len(ids) > limit:
+        return heapq.nsmallest(limit, ids), True
+    return sorted(ids), False
+
 
 class VTracker(object):
     str_na = 'Not Present'
 
+    # Attributes derived from the state on demand, these are not copied.
+    _caches = ('_transitions', '_reachability', '_diff_index')
+
     def __init__(self, versions):
         # type: (Iterable[str]) -> None
         """Instantiate the VTracker for the specified versions.
@@ -39,9 +73,22 @@ class VTracker(object):
         self._idx_to_ver = tuple(versions)  # type: Tuple[str]
         self._graph = Graph()  # type: Graph
 
-        # Track the nodes and edges each uid appears in.
-        self._uid_to_node = defaultdict(set)
-        self._uid_to_edge = defaultdict(set)
+        # The key of each version when the uid is not present, indexed by version.
+        self._na_keys = tuple((v, self.str_na) for v in self._idx_to_ver)  # type: Tuple[Tuple[str, str]]
+
+        # Track the nodes each uid appears in, in order of version (see _get_uid_edges).
+        # A tuple rather than a set, as there is one for every uid.
+        # Insertion order of _uid_to_node matches the positions in _ver_node_ids.
+        self._uid_to_node = dict()  # type: Dict[str, Tuple[Tuple[str, str], ...]]
+
+        # The node id of each uid (in order of addition) at each version.
+        self._ver_node_ids = tuple(array('l') for _ in self._idx_to_ver)  # type: Tuple[array]
+        self._transitions = dict()  # type: Dict[Tuple[str, str], TransitionMatrix]
+        self._reachability = None  # type: Optional[Reachability]
+        self._diff_index = None  # type: Optional[DiffIndex]
+
+        # The keys of the nodes at each version.
+        self._ver_nodes = [list() for _ in self._idx_to_ver]  # type: List[List[Tuple[str, str]]]
 
     def add(self, uid, ver_states):
         # type: (str, Dict[str, str]) -> None
@@ -61,51 +108,308 @@ class VTracker(object):
         DuplicateEntity
             When a duplicate uid is added to the tracker.
         """
-        if len(set(ver_states).difference(set(self._ver_to_idx))) > 0:
-            raise MissingVersion('Specified version which is not a part of this tracker.')
+        # Resolve the key at each version in a single pass, validating as we go.
+        keys = list(self._na_keys)
+        ver_to_idx = self._ver_to_idx
+        for ver, state in ver_states.items():
+            idx = ver_to_idx.get(ver)
+            if idx is None:
+                raise MissingVersion('Specified version which is not a part of this tracker.')
+            keys[idx] = (ver, state)
         if uid in self._uid_to_node:
             raise DuplicateEntity('The specified uid is already in the graph: %s' % uid)
 
-        # Iterate over each expected version.
-        for ver in self._idx_to_ver:
-
-            # Check if this uid appears in this version.
-            key = (ver, self.str_na) if ver not in ver_states else (ver, ver_states[ver])
-            node = self._graph.get_node(key)
-
-            # Create the node associated with this key.
+        # Create the node associated with each key.
+        get_node = self._graph._nodes.get
+        ver_node_ids = self._ver_node_ids
+        created = False
+        for idx, key in enumerate(keys):
+            node = get_node(key)
             if node:
                 node.attrs['uid'].add(uid)
             else:
                 self._graph.add_node(key, attrs={'uid': {uid}})
-            self._uid_to_node[uid].add(key)
+                node = get_node(key)
+                created = True
+                self._ver_nodes[idx].append(key)
+            ver_node_ids[idx].append(node._node_id)
+        self._uid_to_node[uid] = tuple(keys)
+        if self._transitions:
+            self._transitions.clear()
+
+        # Create each of the edges between adjacent versions.
+        if len(keys) > 1:
+            get_edge = self._graph._edges.get
+            for edge_key in zip(keys, keys[1:]):
+                edge = get_edge(edge_key)
+                if edge:
+                    edge.attrs['uid'].add(uid)
+                else:
+                    self._graph.add_edge(*edge_key, attrs={'uid': {uid}})
+                    created = True
+
+        # Reachability only depends on which nodes and edges exist.
+        if created:
+            self._reachability = None
+        if self._diff_index is not None:
+            self._diff_index.add(uid, keys)
+
+    def add_rows(self, rows, max_rows=1000000, tmp_dir=None):
+        # type: (Iterable[Tuple[str, str, str]], int, Optional[str]) -> None
+        """Add entities from long-format (uid, version, state) rows.
+
+        Rows may be in any order, they are grouped by uid using at most
+        max_rows rows of memory (spilling sorted runs to disk beyond that).
+        Entities are added in ascending order of uid.
+
+        Entities are added as they are grouped, so if an exception is raised
+        the tracker keeps every entity added before it (it is partly loaded).
 
-        # Create each of the edges.
-        for i in range(len(self._idx_to_ver) - 1):
-            ver_from, ver_to = self._idx_to_ver[i], self._idx_to_ver[i + 1]
+        Parameters
+        ----------
+        rows : Iterable[Tuple[str, str, str]]
+            The (uid, version, state) rows, in any order.
+        max_rows : int
+            The maximum number of rows to hold in memory.
+        tmp_dir : Optional[str]
+            The directory to spill runs to, None for the system default.
 
-            # Check if this uid appears in this or the next version.
-            if ver_from not in ver_states:
-                key_from = (ver_from, self.str_na)
-            else:
-                key_from = (ver_from, ver_states[ver_from])
-            if ver_to not in ver_states:
-                key_to = (ver_to, self.str_na)
-            else:
-                key_to = (ver_to, ver_states[ver_to])
+        Raises
+        ------
+        MissingVersion
+            When a version isn't in the tracker.
+        DuplicateEntity
+            When a uid is already in the tracker.
+        ConflictingState
+            When a uid is given two different states at the same version.
+        """
+        from .ingest import iter_grouped_rows
+        for uid, ver_states in iter_grouped_rows(rows, max_rows, tmp_dir):
+            self.add(uid, ver_states)
 
-            # Create the edge associated with this key.
-            edge = self._graph.get_edge(key_from, key_to)
-            if edge:
-                edge.attrs['uid'].add(uid)
-            else:
-                self._graph.add_edge(key_from, key_to, attrs={'uid': {uid}})
-            self._uid_to_edge[uid].add((key_from, key_to))
+    def transition_matrix(self, ver_from, ver_to):
+        # type: (str, str) -> TransitionMatrix
+        """Count the uids which moved between the states of any two versions.
+
+        The versions do not need to be adjacent. Matrices are cached until the
+        next entity is added.
+
+        Parameters
+        ----------
+        ver_from : str
+            The source version.
+        ver_to : str
+            The target version.
+
+        Returns
+        -------
+        TransitionMatrix
+            A sparse matrix with source states as rows and target states as columns.
+
+        Raises
+        ------
+        MissingVersion
+            When either version isn't in the tracker.
+        """
+        if ver_from not in self._ver_to_idx or ver_to not in self._ver_to_idx:
+            raise MissingVersion('Specified version which is not a part of this tracker.')
+        matrix = self._transitions.get((ver_from, ver_to))
+        if matrix is None:
+            from .transition import TransitionMatrix
+            matrix = TransitionMatrix.from_columns(ver_from, ver_to,
+                                                   self._ver_node_ids[self._ver_to_idx[ver_from]],
+                                                   self._ver_node_ids[self._ver_to_idx[ver_to]],
+                                                   self._graph)
+            self._transitions[(ver_from, ver_to)] = matrix
+        return matrix
+
+    def select_versions(self, versions):
+        # type: (Iterable[str]) -> VTracker
+        """Create a new tracker containing only a subset of the versions.
+
+        Edges in the new tracker directly connect the selected versions, e.g.
+        as_sankey_json will skip any intermediate versions.
+
+        Parameters
+        ----------
+        versions: Iterable[str]
+            A collection of versions in order of oldest to newest.
+
+        Returns
+        -------
+        VTracker
+            A tracker containing every uid, in the same order of addition.
+
+        Raises
+        ------
+        MissingVersion
+            When a version isn't in the tracker.
+        """
+        versions = tuple(versions)
+        if any(v not in self._ver_to_idx for v in versions):
+            raise MissingVersion('Specified version which is not a part of this tracker.')
+        columns = [self._ver_node_ids[self._ver_to_idx[v]] for v in versions]
+        get_node_key = self._graph.get_node_key
+
+        out = VTracker(versions)
+        for i, uid in enumerate(self._uid_to_node):
+            ver_states = dict()
+            for ver, node_ids in zip(versions, columns):
+                state = get_node_key(node_ids[i])[1]
+                if state != self.str_na:
+                    ver_states[ver] = state
+            out.add(uid, ver_states)
+        return out
+
+    def _get_uid_edges(self, uid):
+        # type: (str) -> Tuple[Tuple[Tuple[str, str], Tuple[str, str]], ...]
+        """Return the keys of the edges a uid travels, in order of version.
+
+        These are derived from the nodes, rather than stored for every uid.
+        """
+        keys = self._uid_to_node[uid]
+        return tuple(zip(keys, keys[1:]))
+
+    def _get_node_id(self, ver, state):
+        # type: (str, str) -> int
+        """Return the id of the node for a state at a version.
+
+        Raises
+        ------
+        MissingVersion
+            When the version isn't in the tracker.
+        MissingState
+            When the state doesn't exist at that version.
+        """
+        if ver not in self._ver_to_idx:
+            raise MissingVersion('Specified version which is not a part of this tracker.')
+        node = self._graph.get_node((ver, state))
+        if node is None:
+            raise MissingState('The state %s does not exist at version %s.' % (state, ver))
+        return node._node_id
+
+    def _get_reachability(self):
+        # type: () -> Reachability
+        """Return the reachability of each node, computed once until a node or edge is added.
+
+        Not Present nodes, and their edges, are left out. They are shared by
+        every uid which is absent at a version, so would link unrelated states.
+        """
+        if self._reachability is None:
+            from .reachability import Reachability
+            get_node = self._graph.get_node
+            str_na = self.str_na
+            self._reachability = Reachability(
+                [[get_node(key)._node_id for key in keys if key[1] != str_na] for keys in self._ver_nodes],
+                ((e._from_node._node_id, e._to_node._node_id) for e in self._graph.iter_edges()
+                 if e._from_node._key[1] != str_na and e._to_node._key[1] != str_na))
+        return self._reachability
+
+    def ancestors(self, ver, state):
+        # type: (str, str) -> List[Tuple[str, str]]
+        """Return every (version, state) which a state was derived from.
+
+        Parameters
+        ----------
+        ver : str
+            The version of the state.
+        state : str
+            The state.
+
+        Returns
+        -------
+        List[Tuple[str, str]]
+            The upstream (version, state) keys, in order of node id. Paths
+            through Not Present states are not followed, so these have none.
+
+        Raises
+        ------
+        MissingVersion
+            When the version isn't in the tracker.
+        MissingState
+            When the state doesn't exist at that version.
+        """
+        node_id = self._get_node_id(ver, state)
+        return [self._graph.get_node_key(i) for i in self._get_reachability().ancestors(node_id)]
+
+    def descendants(self, ver, state):
+        # type: (str, str) -> List[Tuple[str, str]]
+        """Return every (version, state) which a state was split into.
+
+        Parameters
+        ----------
+        ver : str
+            The version of the state.
+        state : str
+            The state.
+
+        Returns
+        -------
+        List[Tuple[str, str]]
+            The downstream (version, state) keys, in order of node id. Paths
+            through Not Present states are not followed, so these have none.
+
+        Raises
+        ------
+        MissingVersion
+            When the version isn't in the tracker.
+        MissingState
+            When the state doesn't exist at that version.
+        """
+        node_id = self._get_node_id(ver, state)
+        return [self._graph.get_node_key(i) for i in self._get_reachability().descendants(node_id)]
+
+    def diff(self, other):
+        # type: (VTracker) -> TrackerDiff
+        """Compare this tracker against another.
+
+        The hashes of each tracker are built on the first diff and then kept
+        up to date by add, so the cost is proportional to the nodes which
+        changed (see diff_trackers).
+
+        Parameters
+        ----------
+        other : VTracker
+            The tracker to compare against.
+
+        Returns
+        -------
+        TrackerDiff
+            The keys of nodes and edges which differ, and the uids which
+            were added, removed, or changed state.
+        """
+        from .diff import diff_trackers
+        return diff_trackers(self, other)
 
-    def _build_uid_paths(self):
-        # type: () -> Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]
+    def _get_diff_index(self):
+        # type: () -> DiffIndex
+        """Return the hashes used by diff, built on first use and then kept up to date by add."""
+        if self._diff_index is None:
+            from .diff import DiffIndex
+            self._diff_index = DiffIndex(self)
+        return self._diff_index
+
+    def freeze(self):
+        # type: () -> FrozenVTracker
+        """Create an immutable snapshot which can be queried concurrently.
+
+        Returns
+        -------
+        FrozenVTracker
+            A copy of this tracker which cannot be modified.
+        """
+        from .snapshot import FrozenVTracker
+        return FrozenVTracker(self)
+
+    def _build_uid_paths(self, uids=None):
+        # type: (Optional[Iterable[str]]) -> Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]
         """Create a set of all nodes and links which each uid is a part of.
 
+        Parameters
+        ----------
+        uids : Optional[Iterable[str]]
+            Only create the sets of these uids, None for every uid.
+
         Returns
         -------
         Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]
@@ -113,8 +417,8 @@ class VTracker(object):
         """
         edges = defaultdict(set)
         nodes = defaultdict(set)
-        for uid in self._uid_to_node.keys():
-            for edge_from, edge_to in self._uid_to_edge[uid]:
+        for uid in self._uid_to_node.keys() if uids is None else uids:
+            for edge_from, edge_to in self._get_uid_edges(uid):
                 edge = self._graph.get_edge(edge_from, edge_to)
                 edges[uid].add(edge._edge_id)
             for node_key in self._uid_to_node[uid]:
@@ -122,59 +426,308 @@ class VTracker(object):
                 nodes[uid].add(cur_node._node_id)
         return nodes, edges
 
-    def as_sankey_json(self):
-        # type: () -> Dict[str, List[dict]]
+    @staticmethod
+    def _highlight_ids(uids, uid_travel_node_id, uid_travel_edge_id):
+        # type: (Iterable[str], Dict[str, Set[int]], Dict[str, Set[int]]) -> Tuple[Set[int], Set[int]]
+        """Collect the node and edge ids travelled by any of the uids.
+
+        Parameters
+        ----------
+        uids : Iterable[str]
+            The uids which are part of the node or edge being highlighted.
+        uid_travel_node_id : Dict[str, Set[int]]
+            The node ids which each uid is a part of.
+        uid_travel_edge_id : Dict[str, Set[int]]
+            The edge ids which each uid is a part of.
+
+        Returns
+        -------
+        Tuple[Set[int], Set[int]]
+            The highlighted node ids, and the highlighted edge ids.
+        """
+        link_highlight_id = set()
+        node_highlight_id = set()
+        for uid in uids:
+            node_highlight_id = node_highlight_id.union(uid_travel_node_id[uid])
+            link_highlight_id = link_highlight_id.union(uid_travel_edge_id[uid])
+        return node_highlight_id, link_highlight_id
+
+    def _sankey_highlights(self, uids, uid_travel_node_id, uid_travel_edge_id, max_highlight):
+        # type: (Set[str], Dict[str, Set[int]], Dict[str, Set[int]], Optional[int]) -> Tuple[Union[List[int], str], Union[List[int], str], bool]
+        """Collect the highlighted node and edge ids, optionally approximated.
+
+        When approximating, more than max_highlight uids highlight everything
+        (HIGHLIGHT_ALL) without computing the union, otherwise each union
+        keeps only its lowest max_highlight ids.
+
+        Parameters
+        ----------
+        uids : Set[str]
+            The uids which are part of the node or edge being highlighted.
+        uid_travel_node_id : Dict[str, Set[int]]
+            The node ids which each uid is a part of.
+        uid_travel_edge_id : Dict[str, Set[int]]
+            The edge ids which each uid is a part of.
+        max_highlight : Optional[int]
+            The maximum size of each highlight set, None for exact.
+
+        Returns
+        -------
+        Tuple[Union[List[int], str], Union[List[int], str], bool]
+            The highlighted node ids, edge ids, and True if either was truncated.
+        """
+        if max_highlight is None:
+            node_highlight_id, link_highlight_id = self._highlight_ids(uids, uid_travel_node_id, uid_travel_edge_id)
+            return list(node_highlight_id), list(link_highlight_id), False
+
+        # Every node and edge has at least one uid, so this is exact if all uids are present.
+        if len(uids) > max_highlight:
+            return HIGHLIGHT_ALL, HIGHLIGHT_ALL, len(uids) < len(self._uid_to_node)
+
+        node_highlight_id, node_truncated = _capped_union(uids, uid_travel_node_id, max_highlight)
+        link_highlight_id, link_truncated = _capped_union(uids, uid_travel_edge_id, max_highlight)
+        return node_highlight_id, link_highlight_id, node_truncated or link_truncated
+
+    def _iter_sankey_nodes(self, uid_travel_node_id, uid_travel_edge_id, max_highlight=None):
+        # type: (Dict[str, Set[int]], Dict[str, Set[int]], Optional[int]) -> Generator[dict]
+        """Generate each of the D3 Sankey nodes in order of node id.
+
+        Parameters
+        ----------
+        uid_travel_node_id : Dict[str, Set[int]]
+            The node ids which each uid is a part of.
+        uid_travel_edge_id : Dict[str, Set[int]]
+            The edge ids which each uid is a part of.
+        max_highlight : Optional[int]
+            The maximum size of each highlight set, None for exact.
+
+        Returns
+        -------
+        Generator[dict]
+            Yields each node formatted for D3.
+        """
+        for node in self._graph.iter_nodes():
+
+            ver, state = node._key
+            node_highlight_id, link_highlight_id, truncated = self._sankey_highlights(
+                node.attrs['uid'], uid_travel_node_id, uid_travel_edge_id, max_highlight)
+
+            record = {'col': ver,
+                      'id': node._node_id,
+                      'linkHighlightId': link_highlight_id,
+                      'name': state,
+                      'nodeHighlightId': node_highlight_id,
+                      'total': len(node.attrs['uid'])}
+            if max_highlight is not None:
+                record['highlightTruncated'] = truncated
+            yield record
+
+    def _iter_sankey_links(self, uid_travel_node_id, uid_travel_edge_id, max_highlight=None):
+        # type: (Dict[str, Set[int]], Dict[str, Set[int]], Optional[int]) -> Generator[dict]
+        """Generate each of the D3 Sankey links in order of edge id.
+
+        Parameters
+        ----------
+        uid_travel_node_id : Dict[str, Set[int]]
+            The node ids which each uid is a part of.
+        uid_travel_edge_id : Dict[str, Set[int]]
+            The edge ids which each uid is a part of.
+        max_highlight : Optional[int]
+            The maximum size of each highlight set, None for exact.
+
+        Returns
+        -------
+        Generator[dict]
+            Yields each link formatted for D3.
+        """
+        for edge in self._graph.iter_edges():
+            node_highlight_id, link_highlight_id, truncated = self._sankey_highlights(
+                edge.attrs['uid'], uid_travel_node_id, uid_travel_edge_id, max_highlight)
+
+            record = {'id': edge._edge_id,
+                      'linkHighlightId': link_highlight_id,
+                      'nodeHighlightId': node_highlight_id,
+                      'source': edge._from_node._node_id,
+                      'target': edge._to_node._node_id,
+                      'value': len(edge.attrs['uid'])}
+            if max_highlight is not None:
+                record['highlightTruncated'] = truncated
+            yield record
+
+    def as_sankey_json(self, max_highlight=None):
+        # type: (Optional[int]) -> Dict[str, List[dict]]
         """Generate the JSON used for creating a D3 Sankey diagram.
 
+        Parameters
+        ----------
+        max_highlight : Optional[int]
+            If set, highlight sets are approximated. A node or link which
+            contains more than max_highlight uids highlights everything, and
+            has both highlight ids set to HIGHLIGHT_ALL. Otherwise, highlight
+            ids are truncated to the lowest max_highlight ids, in order. Each
+            record has highlightTruncated set to True if either of its
+            highlight ids were truncated, or set to HIGHLIGHT_ALL without
+            containing every uid.
+
         Returns
         -------
         Dict[str, List[dict]]
             A dictionary formatted for D3.
+
+        Raises
+        ------
+        ValueError
+            If max_highlight is less than one.
         """
+        if max_highlight is not None and max_highlight < 1:
+            raise ValueError('The maximum highlight size must be a positive integer.')
 
         # Step 1: Get the core layout and edge/node counts
 
-        # Compute the uid paths
-        uid_travel_node_id, uid_travel_edge_id = self._build_uid_paths()
+        # Compute the uid paths, when approximating only the uids of records
+        # which are below the threshold are ever unioned.
+        uids = None  # type: Optional[Set[str]]
+        if max_highlight is not None:
+            uids = set()
+            for item in chain(self._graph._nodes.values(), self._graph._edges.values()):
+                if len(item.attrs['uid']) <= max_highlight:
+                    uids.update(item.attrs['uid'])
+        uid_travel_node_id, uid_travel_edge_id = self._build_uid_paths(uids)
 
         # Step 2: calculate link highlighting
-
         out = {'links': list(),
                'nodes': list()}
 
         # Create each of the nodes in the sankey.
-        for node in self._graph.iter_nodes():
+        out['nodes'].extend(self._iter_sankey_nodes(uid_travel_node_id, uid_travel_edge_id, max_highlight))
 
-            ver, state = node._key
-            link_highlight_id = set()
-            node_highlight_id = set()
+        # Create each of the edges in the sankey.
+        out['links'].extend(self._iter_sankey_links(uid_travel_node_id, uid_travel_edge_id, max_highlight))
 
-            # Iterate over each of the uids which this
-            for uid in node.attrs['uid']:
-                node_highlight_id = node_highlight_id.union(uid_travel_node_id[uid])
-                link_highlight_id = link_highlight_id.union(uid_travel_edge_id[uid])
+        return out
 
-            out['nodes'].append({'col': ver,
-                                 'id': node._node_id,
-                                 'linkHighlightId': list(link_highlight_id),
-                                 'name': state,
-                                 'nodeHighlightId': list(node_highlight_id),
-                                 'total': len(node.attrs['uid'])})
+    def write_sankey_json(self, fh, max_ids=10000000, tmp_dir=None):
+        # type: (IO[str], int, Optional[str]) -> None
+        """Write the D3 Sankey JSON to a file using a bounded amount of memory.
 
-        # Create each of the edges in the sankey.
-        for edge in self._graph.iter_edges():
-            link_highlight_id = set()
-            node_highlight_id = set()
+        The output is identical to json.dump(self.as_sankey_json(), fh).
 
-            for uid in edge.attrs['uid']:
-                node_highlight_id = node_highlight_id.union(uid_travel_node_id[uid])
-                link_highlight_id = link_highlight_id.union(uid_travel_edge_id[uid])
+        Parameters
+        ----------
+        fh : IO[str]
+            The file to write to.
+        max_ids : int
+            The number of highlight ids to hold in memory before spilling
+            records to disk.
+        tmp_dir : Optional[str]
+            The directory to spill to, None for the system default.
+        """
+        from .export import write_sankey_json
+        write_sankey_json(self, fh, max_ids, tmp_dir)
+
+    def as_sankey_columns(self):
+        # type: () -> Dict[str, Union[array, Tuple[str]]]
+        """Generate the D3 Sankey data as parallel columns.
+
+        Each node and link is a position in the arrays (i.e. its id), highlight
+        sets are stored in CSR format where the ids highlighted by record i are
+        indices[offsets[i]:offsets[i + 1]], in ascending order.
+
+        Returns
+        -------
+        Dict[str, Union[array, Tuple[str]]]
+            versions, node_col (index into versions), node_name, node_total,
+            link_source, link_target, link_value, and the offsets/indices of
+            node_node_highlight, node_link_highlight, link_node_highlight and
+            link_link_highlight.
+        """
+        uid_travel_node_id, uid_travel_edge_id = self._build_uid_paths()
 
-            out['links'].append({'id': edge._edge_id,
-                                 'linkHighlightId': list(link_highlight_id),
-                                 'nodeHighlightId': list(node_highlight_id),
-                                 'source': edge._from_node._node_id,
-                                 'target': edge._to_node._node_id,
-                                 'value': len(edge.attrs['uid'])})
+        out = {'versions': self._idx_to_ver,
+               'node_col': array('q'),
+               'node_total': array('q'),
+               'link_source': array('q'),
+               'link_target': array('q'),
+               'link_value': array('q')}
+        for prefix in ('node_node_highlight', 'node_link_highlight',
+                       'link_node_highlight', 'link_link_highlight'):
+            out[prefix + '_offsets'] = array('q', [0])
+            out[prefix + '_indices'] = array('q')
+
+        def append_csr(prefix, ids):
+            out[prefix + '_indices'].extend(sorted(ids))
+            out[prefix + '_offsets'].append(len(out[prefix + '_indices']))
+
+        node_name = list()
+        for node in self._graph.iter_nodes():
+            ver, state = node._key
+            node_highlight_id, link_highlight_id = self._highlight_ids(
+                node.attrs['uid'], uid_travel_node_id, uid_travel_edge_id)
+            out['node_col'].append(self._ver_to_idx[ver])
+            out['node_total'].append(len(node.attrs['uid']))
+            node_name.append(state)
+            append_csr('node_node_highlight', node_highlight_id)
+            append_csr('node_link_highlight', link_highlight_id)
+        out['node_name'] = tuple(node_name)
+
+        for edge in self._graph.iter_edges():
+            node_highlight_id, link_highlight_id = self._highlight_ids(
+                edge.attrs['uid'], uid_travel_node_id, uid_travel_edge_id)
+            out['link_source'].append(edge._from_node._node_id)
+            out['link_target'].append(edge._to_node._node_id)
+            out['link_value'].append(len(edge.attrs['uid']))
+            append_csr('link_node_highlight', node_highlight_id)
+            append_csr('link_link_highlight', link_highlight_id)
 
         return out
+
+    def as_sankey_json_async(self, executor=None):
+        # type: (Optional[Executor]) -> Awaitable[Dict[str, List[dict]]]
+        """Generate the D3 Sankey JSON without blocking the asyncio event loop.
+
+        The export is run in the executor, the tracker must not be modified
+        until the returned awaitable has completed.
+
+        Parameters
+        ----------
+        executor : Optional[Executor]
+            The executor to run the export in, None for the loop default.
+
+        Returns
+        -------
+        Awaitable[Dict[str, List[dict]]]
+            Resolves to the same dictionary as as_sankey_json.
+        """
+        from .aio import as_sankey_json_async
+        return as_sankey_json_async(self, executor)
+
+    def iter_sankey_json_async(self, chunk_size=1000, executor=None):
+        # type: (int, Optional[Executor]) -> AsyncIterator[Tuple[str, List[dict]]]
+        """Asynchronously iterate over the D3 Sankey JSON in chunks.
+
+        All nodes are yielded before the links, each chunk is computed in the
+        executor so that responses can be streamed as they become available.
+        The chunks share generator state with the caller, so process pools
+        are not supported.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The maximum number of records in each chunk.
+        executor : Optional[Executor]
+            The executor to run the export in, None for the loop default.
+            This must not be a ProcessPoolExecutor.
+
+        Returns
+        -------
+        AsyncIterator[Tuple[str, List[dict]]]
+            Yields ('nodes' or 'links', records) for each chunk.
+
+        Raises
+        ------
+        ValueError
+            If the chunk size is less than one, or the executor is a
+            ProcessPoolExecutor.
+        """
+        from .aio import iter_sankey_json_async
+        return iter_sankey_json_async(self, chunk_size, executor)